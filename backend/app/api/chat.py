@@ -3,10 +3,12 @@ Chat API endpoints
 Handles AI chat interface and task execution through natural language
 """
 
+import asyncio
 import json
 import time
+import orjson
 from typing import Dict, List, Any, Optional
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -35,6 +37,10 @@ class ChatAnalyzeRequest(BaseModel):
     context: List[ChatMessage] = []
 
 
+class ChatAnalyzeBatchRequest(BaseModel):
+    messages: List[ChatAnalyzeRequest]
+
+
 class ChatExecuteRequest(BaseModel):
     action: Dict[str, Any]
     provider: LLMProvider = LLMProvider.OPENROUTER
@@ -72,15 +78,37 @@ async def analyze_chat_message(
 ):
     """Analyze user message and suggest actions"""
     try:
-        # Build context from previous messages
-        context_text = ""
-        if request.context:
-            context_text = "\n".join([
-                f"{msg.type}: {msg.content}" for msg in request.context[-3:]
-            ])
-
-        # Create analysis prompt
-        analysis_prompt = f"""
+        return await _analyze_message(request)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/analyze/batch")
+async def analyze_chat_messages(request: ChatAnalyzeBatchRequest):
+    """Analyze several messages in one request; each result is an analysis or {"error": ...}"""
+    results = await asyncio.gather(
+        *(_analyze_message(message) for message in request.messages),
+        return_exceptions=True
+    )
+    return {
+        "results": [
+            {"error": str(result)} if isinstance(result, Exception) else result
+            for result in results
+        ]
+    }
+
+
+async def _analyze_message(request: ChatAnalyzeRequest) -> Dict[str, Any]:
+    """Ask the LLM what the user wants and which actions would help"""
+    # Build context from previous messages
+    context_text = ""
+    if request.context:
+        context_text = "\n".join([
+            f"{msg.type}: {msg.content}" for msg in request.context[-3:]
+        ])
+
+    # Create analysis prompt
+    analysis_prompt = f"""
 You are an AI assistant that helps users interact with MCP (Model Context Protocol) servers to accomplish tasks.
 
 Context from previous conversation:
@@ -133,30 +161,27 @@ Respond with a JSON object containing:
 Be helpful, specific, and actionable. If you can't help with something, explain why and suggest alternatives.
 """
 
-        # Get AI analysis
-        response = await llm_service._call_llm(
-            prompt=analysis_prompt,
-            provider=request.provider,
-            model=request.model,
-            max_tokens=1000
-        )
-
-        # Try to parse JSON response
-        try:
-            analysis_data = json.loads(response)
-        except json.JSONDecodeError:
-            # If JSON parsing fails, create a simple response
-            analysis_data = {
-                "analysis": response,
-                "canHelp": True,
-                "suggestedActions": [],
-                "confidence": 0.5
-            }
+    # Get AI analysis
+    response = await llm_service._call_llm(
+        prompt=analysis_prompt,
+        provider=request.provider,
+        model=request.model,
+        max_tokens=1000
+    )
 
-        return analysis_data
+    # Try to parse JSON response
+    try:
+        analysis_data = json.loads(response)
+    except json.JSONDecodeError:
+        # If JSON parsing fails, create a simple response
+        analysis_data = {
+            "analysis": response,
+            "canHelp": True,
+            "suggestedActions": [],
+            "confidence": 0.5
+        }
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return analysis_data
 
 
 @router.post("/execute")
@@ -300,26 +325,30 @@ async def execute_chat_action(
         }
 
 
+# Suggested prompts never change, so the response body is rendered once
+CHAT_SUGGESTIONS_BODY = orjson.dumps({
+    "suggestions": [
+        "Find GitHub servers that can analyze code repositories",
+        "Connect to a file system server and list available tools",
+        "Search for database servers that can help with SQL queries",
+        "Find web scraping servers for data extraction",
+        "Look for development tools that can help with code linting",
+        "Create a task to analyze a specific GitHub repository",
+        "Find servers that can help with API integration",
+        "Search for servers that can process and analyze text files"
+    ]
+})
+
+
 @router.get("/suggestions")
 async def get_chat_suggestions():
     """Get suggested prompts for users"""
-    return {
-        "suggestions": [
-            "Find GitHub servers that can analyze code repositories",
-            "Connect to a file system server and list available tools",
-            "Search for database servers that can help with SQL queries",
-            "Find web scraping servers for data extraction",
-            "Look for development tools that can help with code linting",
-            "Create a task to analyze a specific GitHub repository",
-            "Find servers that can help with API integration",
-            "Search for servers that can process and analyze text files"
-        ]
-    }
+    return Response(content=CHAT_SUGGESTIONS_BODY, media_type="application/json")
 
 
 @router.get("/providers")
 async def get_available_providers():
-    """Get available LLM providers for chat"""
+    """Get available LLM providers for chat (cached by task_service)"""
     try:
         providers = await task_service.get_available_llm_providers()
         return providers
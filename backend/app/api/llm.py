@@ -40,6 +40,13 @@ async def get_available_providers():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.delete("/providers/cache")
+async def clear_providers_cache():
+    """Clear the cached provider and model lists"""
+    task_service.clear_provider_cache()
+    return {"success": True, "message": "Provider cache cleared"}
+
+
 @router.post("/execute-task")
 async def execute_task_with_llm(request: TaskExecutionRequest):
     """Execute a task with specific LLM provider and model"""
@@ -97,7 +104,8 @@ async def test_llm_connection(request: LLMProviderRequest):
             prompt=test_prompt,
             provider=request.provider,
             model=request.model,
-            max_tokens=50
+            max_tokens=50,
+            use_cache=False
         )
         
         return {
@@ -3,8 +3,9 @@ MCP Client API endpoints
 Handles MCP server connections and tool execution
 """
 
-from typing import Dict, List, Any, Optional
+from typing import AsyncIterator, Dict, List, Any, Optional
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -116,7 +117,7 @@ async def execute_tool(request: ToolExecutionRequest):
     """Execute a tool on an MCP server"""
     try:
         import time
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         
         result = await mcp_client.execute_tool(
             server_id=request.server_id,
@@ -124,7 +125,7 @@ async def execute_tool(request: ToolExecutionRequest):
             arguments=request.arguments
         )
         
-        response_time_ms = (time.time() - start_time) * 1000
+        response_time_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
         
         # Record metrics
         monitoring_service.record_server_request(
@@ -154,6 +155,55 @@ async def execute_tool(request: ToolExecutionRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/execute-tool/stream")
+async def execute_tool_stream(request: ToolExecutionRequest):
+    """
+    Execute a tool on an HTTP MCP server and stream its JSON-RPC response
+    
+    For results too large to buffer (file contents, images). The server's
+    response body is passed through unchanged as it arrives.
+    """
+    import time
+    start_ns = time.perf_counter_ns()
+    
+    chunks = mcp_client.stream_tool_http(
+        server_id=request.server_id,
+        tool_name=request.tool_name,
+        arguments=request.arguments
+    )
+    try:
+        # Wait for the first chunk so connection and HTTP errors still get a
+        # proper error response instead of a truncated body
+        first_chunk = await anext(chunks, b"")
+    except Exception as e:
+        await chunks.aclose()
+        monitoring_service.record_server_request(
+            server_id=request.server_id,
+            server_name=f"server_{request.server_id}",
+            success=False,
+            response_time_ms=0
+        )
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    monitoring_service.record_server_request(
+        server_id=request.server_id,
+        server_name=f"server_{request.server_id}",
+        success=True,
+        response_time_ms=(time.perf_counter_ns() - start_ns) / 1_000_000
+    )
+    
+    async def body() -> AsyncIterator[bytes]:
+        try:
+            if first_chunk:
+                yield first_chunk
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+    
+    return StreamingResponse(body(), media_type="application/json")
+
+
 @router.get("/servers/{server_id}/capabilities")
 async def get_server_capabilities(server_id: int):
     """Get capabilities of an MCP server"""
@@ -4,8 +4,9 @@ Handles system monitoring, metrics, and health checks
 """
 
 from typing import Dict, List, Any, Optional
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import PlainTextResponse
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST
 
 from ..services.monitoring_service import monitoring_service
 
@@ -53,11 +54,14 @@ async def get_active_alerts():
 
 
 @router.get("/metrics/prometheus", response_class=PlainTextResponse)
-async def get_prometheus_metrics():
+async def get_prometheus_metrics(if_none_match: Optional[str] = Header(None)):
     """Get Prometheus metrics in text format"""
     try:
-        metrics = monitoring_service.get_prometheus_metrics()
-        return metrics
+        body, etag = monitoring_service.get_prometheus_metrics()
+        headers = {"ETag": etag} if etag else None
+        if etag and if_none_match == etag:
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type=CONTENT_TYPE_LATEST, headers=headers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -199,7 +199,8 @@ async def test_provider_connection(provider: LLMProvider, model: str):
             prompt=test_prompt,
             provider=provider,
             model=model,
-            max_tokens=50
+            max_tokens=50,
+            use_cache=False
         )
         
         if "Connection successful" in response or len(response) > 0:
@@ -2,17 +2,20 @@
 Task management API endpoints
 """
 
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import func
 
-from ..core.database import get_sync_db
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal, get_sync_db
 from ..models.task import (
     Task, TaskCreate, TaskUpdate, TaskResponse, TaskExecution,
     TaskStats, TaskQueue, TaskStatus, TaskPriority
 )
 from ..models.mcp_server import MCPServer
+from ..services.task_service import task_service
 
 router = APIRouter()
 
@@ -25,40 +28,32 @@ async def get_tasks(
     priority: Optional[TaskPriority] = Query(None, description="Filter by task priority"),
     category: Optional[str] = Query(None, description="Filter by task category"),
     user_id: Optional[str] = Query(None, description="Filter by user ID"),
-    session_id: Optional[str] = Query(None, description="Filter by session ID"),
-    db: Session = Depends(get_sync_db)
+    session_id: Optional[str] = Query(None, description="Filter by session ID")
 ):
-    """Get list of tasks with optional filtering"""
-    query = db.query(Task)
-    
-    # Apply filters
-    if status:
-        query = query.filter(Task.status == status)
-    
-    if priority:
-        query = query.filter(Task.priority == priority)
-    
-    if category:
-        query = query.filter(Task.category == category)
-    
-    if user_id:
-        query = query.filter(Task.user_id == user_id)
-    
-    if session_id:
-        query = query.filter(Task.session_id == session_id)
-    
-    # Order by priority and creation time
-    priority_order = {
-        TaskPriority.URGENT: 4,
-        TaskPriority.HIGH: 3,
-        TaskPriority.NORMAL: 2,
-        TaskPriority.LOW: 1
-    }
-    
-    query = query.order_by(desc(Task.created_at))
-    
-    tasks = query.offset(skip).limit(limit).all()
-    return tasks
+    """
+    Get list of tasks with optional filtering, newest first
+    
+    Rows come from a server-side cursor and are written out as they arrive,
+    so a large page is never held in memory at once.
+    """
+    return StreamingResponse(
+        _stream_task_list(
+            skip=skip, limit=limit, status=status, priority=priority,
+            category=category, user_id=user_id, session_id=session_id
+        ),
+        media_type="application/json"
+    )
+
+
+async def _stream_task_list(**filters) -> AsyncIterator[bytes]:
+    """JSON array of TaskResponse objects, one task at a time"""
+    # The generator owns its session, since it outlives the endpoint call
+    async with AsyncSessionLocal() as db:
+        separator = b"["
+        async for task in task_service.stream_tasks(db, **filters):
+            yield separator + TaskResponse.model_validate(task).model_dump_json().encode()
+            separator = b","
+        yield b"[]" if separator == b"[" else b"]"
 
 
 @router.get("/{task_id}", response_model=TaskResponse)
@@ -83,7 +78,7 @@ async def create_task(
     db.refresh(db_task)
     
     # Schedule task execution in background
-    background_tasks.add_task(execute_task_background, db_task.id)
+    await _schedule_execution(db_task, background_tasks)
     
     return db_task
 
@@ -158,7 +153,7 @@ async def execute_task(
     db.commit()
     
     # Schedule task execution in background
-    background_tasks.add_task(execute_task_background, task.id)
+    await _schedule_execution(task, background_tasks)
     
     return {"message": "Task execution scheduled", "task_id": task_id}
 
@@ -176,6 +171,13 @@ async def cancel_task(task_id: int, db: Session = Depends(get_sync_db)):
             detail="Can only cancel pending or running tasks"
         )
     
+    if task_id in task_service.queued_tasks:
+        # Also revokes the worker execution
+        result = await task_service.cancel_task(task_id)
+        if not result["success"]:
+            raise HTTPException(status_code=400, detail=result["error"])
+        return {"message": "Task cancelled", "task_id": task_id}
+    
     task.status = TaskStatus.CANCELLED
     db.commit()
     
@@ -185,11 +187,16 @@ async def cancel_task(task_id: int, db: Session = Depends(get_sync_db)):
 @router.get("/stats/overview", response_model=TaskStats)
 async def get_task_stats(db: Session = Depends(get_sync_db)):
     """Get overview statistics for tasks"""
-    total_tasks = db.query(func.count(Task.id)).scalar()
-    pending_tasks = db.query(func.count(Task.id)).filter(Task.status == TaskStatus.PENDING).scalar()
-    running_tasks = db.query(func.count(Task.id)).filter(Task.status == TaskStatus.RUNNING).scalar()
-    completed_tasks = db.query(func.count(Task.id)).filter(Task.status == TaskStatus.COMPLETED).scalar()
-    failed_tasks = db.query(func.count(Task.id)).filter(Task.status == TaskStatus.FAILED).scalar()
+    # Count every status in one grouped query
+    status_counts = {
+        TaskStatus(status).value: count
+        for status, count in db.query(Task.status, func.count(Task.id)).group_by(Task.status).all()
+    }
+    total_tasks = sum(status_counts.values())
+    pending_tasks = status_counts.get(TaskStatus.PENDING.value, 0)
+    running_tasks = status_counts.get(TaskStatus.RUNNING.value, 0)
+    completed_tasks = status_counts.get(TaskStatus.COMPLETED.value, 0)
+    failed_tasks = status_counts.get(TaskStatus.FAILED.value, 0)
     
     # Calculate average execution time
     avg_execution_time = db.query(func.avg(Task.execution_time_ms)).filter(
@@ -257,6 +264,14 @@ async def get_task_categories(db: Session = Depends(get_sync_db)):
     return {"categories": sorted(categories)}
 
 
+async def _schedule_execution(task: Task, background_tasks: BackgroundTasks):
+    """Hand the task to a Celery worker when the queue is enabled, else run it here"""
+    if settings.TASK_QUEUE_ENABLED:
+        await task_service.start_execution(task)
+    else:
+        background_tasks.add_task(execute_task_background, task.id)
+
+
 async def execute_task_background(task_id: int):
     """Background task execution function"""
     # This would be implemented to actually execute the task
@@ -0,0 +1,24 @@
+"""
+Celery application for running tasks outside the API process
+"""
+
+from celery import Celery
+
+from .config import settings
+
+celery_app = Celery(
+    "hisper",
+    broker=settings.CELERY_BROKER_URL or settings.REDIS_URL,
+    backend=settings.CELERY_RESULT_BACKEND or settings.REDIS_URL,
+    include=["app.services.task_worker"]
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    task_acks_late=True,
+    # Tasks are long-running LLM pipelines; don't let one worker hoard the queue
+    worker_prefetch_multiplier=1,
+    result_expires=24 * 3600
+)
@@ -15,19 +15,26 @@ class Settings(BaseSettings):
     APP_NAME: str = "Hisper"
     APP_VERSION: str = "1.0.0"
     DEBUG: bool = False
+    # "prod" runs several worker processes without reload
+    HISPER_ENV: str = "dev"
+    WEB_CONCURRENCY: Optional[int] = None  # defaults to the CPU count
     
     # API
     API_V1_STR: str = "/api/v1"
     
     # Database
     DATABASE_URL: str = "sqlite:///./hisper.db"
+    # Connection pool for server databases (ignored for SQLite)
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE_SECONDS: int = 1800
     
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
     # CORS
-    BACKEND_CORS_ORIGINS: List[str] = ["*"]
+    BACKEND_CORS_ORIGINS: List[str] = ["http://localhost:12001", "http://127.0.0.1:12001"]
     
     # MCP Discovery
     DISCOVERY_INTERVAL_MINUTES: int = 60
@@ -44,6 +51,13 @@ class Settings(BaseSettings):
     
     # Redis (for caching and task queue)
     REDIS_URL: str = "redis://localhost:6379"
+    # Pub/sub channel that relays WebSocket broadcasts between workers
+    WS_FANOUT_CHANNEL: str = "hisper:ws"
+    
+    # Background task queue (Celery); tasks run in-process when disabled
+    TASK_QUEUE_ENABLED: bool = False
+    CELERY_BROKER_URL: Optional[str] = None  # defaults to REDIS_URL
+    CELERY_RESULT_BACKEND: Optional[str] = None  # defaults to REDIS_URL
     
     # Logging
     LOG_LEVEL: str = "INFO"
@@ -54,13 +68,37 @@ class Settings(BaseSettings):
     OPENROUTER_API_KEY: Optional[str] = None
     OLLAMA_BASE_URL: str = "http://localhost:11434"
     
+    # Outbound HTTP connection pool for LLM providers; by default each pool
+    # is sized from the *_CONCURRENCY limits of the providers it serves
+    HTTPX_MAX_CONN: Optional[int] = None
+    HTTPX_KEEPALIVE: Optional[int] = None
+    
     # Default LLM settings
     DEFAULT_LLM_PROVIDER: str = "openrouter"
     DEFAULT_LLM_MODEL: str = "deepseek/deepseek-chat"
     
+    # Outbound LLM concurrency per provider (roughly 0.5x of RPM / 60)
+    OPENAI_CONCURRENCY: int = 4
+    ANTHROPIC_CONCURRENCY: int = 4
+    OPENROUTER_CONCURRENCY: int = 4
+    OLLAMA_CONCURRENCY: int = 2
+    LLM_MAX_RETRIES: int = 3
+    LLM_MODELS_CACHE_TTL_SECONDS: int = 300
+    
+    # LLM response cache
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_TTL_SECONDS: int = 3600
+    LLM_CACHE_MAX_ENTRIES: int = 1024
+    LLM_SEMANTIC_CACHE_ENABLED: bool = False
+    LLM_SEMANTIC_CACHE_THRESHOLD: float = 0.92
+    LLM_EMBEDDING_MODEL: str = "text-embedding-3-small"
+    
     # MCP Settings
     MCP_TIMEOUT: int = 30  # seconds
     MCP_MAX_RETRIES: int = 3
+    MAX_PARALLEL_PLAN_STEPS: int = 4
+    MCP_INSTALL_CACHE_DIR: str = "./data/mcp_cache"
+    MCP_INSTALL_CACHE_MAX_ENTRIES: int = 32
     
     # Monitoring
     MONITORING_ENABLED: bool = True
@@ -22,9 +22,18 @@ if settings.DATABASE_URL.startswith("sqlite"):
         echo=settings.DEBUG
     )
 else:
-    # For PostgreSQL and other databases
-    engine = create_engine(settings.DATABASE_URL)
-    async_engine = create_async_engine(settings.DATABASE_URL, echo=settings.DEBUG)
+    # For PostgreSQL and other databases; keep long-lived, validated connections
+    # so bursts of background tasks reuse them instead of reconnecting
+    pool_options = dict(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_pre_ping=True,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS
+    )
+    engine = create_engine(settings.DATABASE_URL, **pool_options)
+    async_engine = create_async_engine(
+        settings.DATABASE_URL, echo=settings.DEBUG, **pool_options
+    )
 
 # Create session makers
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
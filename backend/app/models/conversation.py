@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional, List
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text, Boolean, JSON, Float
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text, Boolean, JSON, Float
 from sqlalchemy.orm import relationship
 
 from ..core.database import Base
@@ -35,6 +35,7 @@ class AudioBlob(Base):
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (Index("ix_messages_convo_time", "conversation_id", "created_at"),)
 
     id = Column(Integer, primary_key=True, index=True)
     conversation_id = Column(Integer, ForeignKey("conversations.id", ondelete="CASCADE"))
@@ -4,7 +4,7 @@ import logging
 from datetime import datetime
 from typing import List, Optional
 
-from sqlalchemy import select
+from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models.conversation import Conversation, Message, AudioBlob
@@ -86,34 +86,45 @@ class ConversationService:
         include_summaries: bool = True,
     ) -> List[Message]:
         budget = max_tokens or self.token_budget
-        result = await db.execute(
-            select(Message).where(Message.conversation_id == conversation_id).order_by(Message.created_at)
+        pinned_result = await db.execute(
+            select(Message)
+            .where(Message.conversation_id == conversation_id, Message.pinned.is_(True))
+            .order_by(Message.created_at)
         )
-        messages: List[Message] = list(result.scalars().all())
+        pinned: List[Message] = list(pinned_result.scalars().all())
 
-        pinned = [m for m in messages if m.pinned]
-        unpinned = [m for m in messages if not m.pinned]
+        # Every message costs at least one token, so no more than `budget` recent
+        # unpinned messages can fit; fetch newest-first and stop there.
+        recent_result = await db.execute(
+            select(Message)
+            .where(Message.conversation_id == conversation_id, Message.pinned.is_not(True))
+            .order_by(Message.created_at.desc())
+            .limit(budget)
+        )
+        recent_unpinned: List[Message] = list(recent_result.scalars().all())
 
         included: List[Message] = []
         used_tokens = sum(m.token_count for m in pinned)
         included.extend(pinned)
 
-        for message in reversed(unpinned):
+        for message in recent_unpinned:
             if used_tokens + message.token_count > budget:
                 continue
             included.insert(len(pinned), message)
             used_tokens += message.token_count
 
         if include_summaries:
-            conversation_result = await db.execute(select(Conversation).where(Conversation.id == conversation_id))
-            conversation = conversation_result.scalar_one_or_none()
-            if conversation and conversation.summary_text:
+            # Only the summary text is loaded; its token estimate is cheap to derive
+            summary_text = await db.scalar(
+                select(Conversation.summary_text).where(Conversation.id == conversation_id)
+            )
+            if summary_text:
                 summary_message = Message(
                     id=-1,
                     conversation_id=conversation_id,
                     role="summary",
-                    content=conversation.summary_text,
-                    token_count=self._estimate_tokens(conversation.summary_text),
+                    content=summary_text,
+                    token_count=self._estimate_tokens(summary_text),
                     pinned=True,
                     created_at=datetime.utcnow(),
                 )
@@ -121,27 +132,34 @@ class ConversationService:
         return included
 
     async def update_summary(self, db: AsyncSession, conversation_id: int, keep_last: int = 5) -> None:
+        total = await db.scalar(
+            select(func.count()).select_from(Message).where(Message.conversation_id == conversation_id)
+        )
+        if total <= keep_last:
+            return
+
         result = await db.execute(
-            select(Message)
+            select(Message.role, Message.content)
             .where(Message.conversation_id == conversation_id)
             .order_by(Message.created_at)
+            .limit(total - keep_last)
         )
-        messages = list(result.scalars().all())
-        if len(messages) <= keep_last:
-            return
-
-        historical = messages[:-keep_last]
-        summary = "\n".join([f"{m.role}: {m.content[:200]}" for m in historical])
-
-        convo_result = await db.execute(select(Conversation).where(Conversation.id == conversation_id))
-        conversation = convo_result.scalar_one_or_none()
-        if conversation:
-            conversation.summary_text = summary
-            conversation.updated_at = datetime.utcnow()
-            await db.commit()
+        summary = "\n".join(f"{role}: {content[:200]}" for role, content in result)
+
+        await db.execute(
+            update(Conversation)
+            .where(Conversation.id == conversation_id)
+            .values(
+                summary_text=summary,
+                updated_at=datetime.utcnow(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
 
     def _estimate_tokens(self, content: str) -> int:
-        return max(1, len(content.split()))
+        # Count separators in C rather than materializing a list via split()
+        return max(1, content.count(" ") + content.count("\n") + 1)
 
 
 conversation_service = ConversationService()
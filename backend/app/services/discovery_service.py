@@ -9,6 +9,7 @@ import re
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 import httpx
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 
 from ..core.config import settings
@@ -22,9 +23,23 @@ class DiscoveryService:
     """Service for discovering MCP servers from various sources"""
     
     def __init__(self):
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self._client: Optional[httpx.AsyncClient] = None
         self.is_running = False
         self.discovery_task = None
+        self._stop_event = asyncio.Event()
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared HTTP client, created on first use"""
+        if self._client is None or self._client.is_closed:
+            # HTTP/2 lets concurrent registry calls multiplex over one connection per host
+            self._client = httpx.AsyncClient(
+                timeout=30.0,
+                http2=True,
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+                headers={"Accept-Encoding": "gzip"}
+            )
+        return self._client
         
     async def start_periodic_discovery(self):
         """Start periodic discovery of MCP servers"""
@@ -32,22 +47,37 @@ class DiscoveryService:
             return
             
         self.is_running = True
+        self._stop_event.clear()
         logger.info("Starting periodic MCP server discovery")
         
         while self.is_running:
             try:
                 await self.discover_all_sources()
-                await asyncio.sleep(settings.DISCOVERY_INTERVAL_MINUTES * 60)
+                interval = settings.DISCOVERY_INTERVAL_MINUTES * 60
             except Exception as e:
                 logger.error(f"Error in periodic discovery: {e}")
-                await asyncio.sleep(300)  # Wait 5 minutes on error
+                interval = 300  # Wait 5 minutes on error
+            
+            if await self._wait_for_stop(interval):
+                break
+    
+    async def _wait_for_stop(self, timeout: float) -> bool:
+        """Sleep for up to `timeout` seconds, returning True early if stop() is called"""
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
     
     async def stop(self):
         """Stop the discovery service"""
         self.is_running = False
+        self._stop_event.set()
         if self.discovery_task:
             self.discovery_task.cancel()
-        await self.client.aclose()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
         logger.info("Discovery service stopped")
     
     async def discover_all_sources(self):
@@ -105,11 +135,13 @@ class DiscoveryService:
                 if response.status_code == 200:
                     data = response.json()
                     
+                    found = []
                     for repo in data.get("items", []):
                         if await self._is_mcp_server_repo(repo):
                             server_data = await self._extract_github_server_info(repo)
-                            if server_data and await self._save_discovered_server(server_data):
-                                discovered_count += 1
+                            if server_data:
+                                found.append(server_data)
+                    discovered_count += await self._save_discovered_servers(found)
                 
                 # Rate limiting
                 await asyncio.sleep(1)
@@ -141,11 +173,13 @@ class DiscoveryService:
                 if response.status_code == 200:
                     data = response.json()
                     
+                    found = []
                     for package in data.get("objects", []):
-                        if await self._is_mcp_server_package(package, "npm"):
+                        if self._is_mcp_server_package_npm(package):
                             server_data = await self._extract_npm_server_info(package)
-                            if server_data and await self._save_discovered_server(server_data):
-                                discovered_count += 1
+                            if server_data:
+                                found.append(server_data)
+                    discovered_count += await self._save_discovered_servers(found)
                 
                 await asyncio.sleep(0.5)
         
@@ -174,14 +208,16 @@ class DiscoveryService:
                     # Parse HTML response to extract package names
                     package_names = self._extract_pypi_package_names(response.text)
                     
+                    found = []
                     for package_name in package_names[:20]:  # Limit to first 20
                         package_info = await self._get_pypi_package_info(package_name)
-                        if package_info and await self._is_mcp_server_package(package_info, "pypi"):
+                        if package_info and self._is_mcp_server_package_pypi(package_info):
                             server_data = await self._extract_pypi_server_info(package_info)
-                            if server_data and await self._save_discovered_server(server_data):
-                                discovered_count += 1
+                            if server_data:
+                                found.append(server_data)
                         
                         await asyncio.sleep(0.5)
+                    discovered_count += await self._save_discovered_servers(found)
                 
                 await asyncio.sleep(1)
         
@@ -202,15 +238,23 @@ class DiscoveryService:
         
         return any(indicator in name or indicator in description for indicator in mcp_indicators)
     
-    async def _is_mcp_server_package(self, package: Dict[str, Any], source: str) -> bool:
-        """Check if a package is likely an MCP server"""
-        if source == "npm":
-            name = package.get("package", {}).get("name", "").lower()
-            description = package.get("package", {}).get("description", "").lower()
-        else:  # pypi
-            name = package.get("name", "").lower()
-            description = package.get("summary", "").lower()
-        
+    def _is_mcp_server_package_npm(self, package: Dict[str, Any]) -> bool:
+        """Check if an npm search result is likely an MCP server"""
+        pkg_info = package.get("package", {})
+        return self._matches_mcp_indicators(
+            pkg_info.get("name", "").lower(),
+            pkg_info.get("description", "").lower()
+        )
+    
+    def _is_mcp_server_package_pypi(self, package: Dict[str, Any]) -> bool:
+        """Check if a PyPI package is likely an MCP server"""
+        return self._matches_mcp_indicators(
+            package.get("name", "").lower(),
+            package.get("summary", "").lower()
+        )
+    
+    def _matches_mcp_indicators(self, name: str, description: str) -> bool:
+        """Check a lowercased name/description pair against MCP indicators"""
         mcp_indicators = [
             "mcp", "model context protocol", "server", "anthropic", "claude"
         ]
@@ -310,34 +354,54 @@ class DiscoveryService:
     
     async def _save_discovered_server(self, server_data: MCPServerCreate) -> bool:
         """Save discovered server to database if it doesn't already exist"""
+        return await self._save_discovered_servers([server_data]) > 0
+    
+    async def _save_discovered_servers(self, servers: List[MCPServerCreate]) -> int:
+        """
+        Save a batch of discovered servers, returning how many were new
+        
+        Existing servers (same name and URL) get their last_updated bumped. The
+        whole batch costs one lookup, one update and one commit, rather than a
+        query and commit per server.
+        """
+        # Drop repeats within the batch; the first occurrence wins
+        unique: Dict[tuple, MCPServerCreate] = {}
+        for server_data in servers:
+            unique.setdefault((server_data.name, server_data.url), server_data)
+        if not unique:
+            return 0
+        
+        db = None
         try:
             db = next(get_sync_db())
             
-            # Check if server already exists
-            existing = db.query(MCPServer).filter(
-                MCPServer.name == server_data.name,
-                MCPServer.url == server_data.url
-            ).first()
+            # Check which servers already exist
+            existing = db.query(MCPServer.id, MCPServer.name, MCPServer.url).filter(
+                tuple_(MCPServer.name, MCPServer.url).in_(list(unique))
+            ).all()
             
             if existing:
                 # Update last_updated timestamp
-                existing.last_updated = datetime.utcnow()
-                db.commit()
-                return False
+                db.query(MCPServer).filter(
+                    MCPServer.id.in_([row.id for row in existing])
+                ).update({MCPServer.last_updated: datetime.utcnow()}, synchronize_session=False)
+                for row in existing:
+                    unique.pop((row.name, row.url), None)
             
-            # Create new server
-            db_server = MCPServer(**server_data.dict())
-            db.add(db_server)
+            # Create new servers
+            db.add_all([MCPServer(**server_data.dict()) for server_data in unique.values()])
             db.commit()
             
-            logger.info(f"Saved new MCP server: {server_data.name}")
-            return True
+            for server_data in unique.values():
+                logger.info(f"Saved new MCP server: {server_data.name}")
+            return len(unique)
             
         except Exception as e:
-            logger.error(f"Error saving discovered server: {e}")
-            return False
+            logger.error(f"Error saving discovered servers: {e}")
+            return 0
         finally:
-            db.close()
+            if db is not None:
+                db.close()
     
     async def manual_discovery(self, url: str, name: Optional[str] = None) -> bool:
         """Manually add a server for discovery"""
@@ -0,0 +1,177 @@
+"""
+LLM Response Cache
+Exact-match and semantic caching of LLM completions
+"""
+
+import hashlib
+import logging
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Protocol, Tuple
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(Protocol):
+    """Storage interface for cached LLM responses"""
+
+    async def get(self, key: str) -> Optional[str]:
+        ...
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        ...
+
+    async def clear(self) -> None:
+        ...
+
+
+class InMemoryLRUBackend:
+    """Bounded in-process LRU store with per-entry expiry"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+
+
+class LLMCache:
+    """
+    Exact-match response cache placed in front of LLM provider calls
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None, ttl: int = 3600):
+        self.backend = backend or InMemoryLRUBackend()
+        self.ttl = ttl
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def make_key(
+        provider: str,
+        model: str,
+        max_tokens: int,
+        prompt: str,
+        schema: Optional[str] = None,
+        system: Optional[str] = None
+    ) -> str:
+        """Build a stable cache key for a completion request"""
+        payload = orjson.dumps(
+            {
+                "p": provider, "m": model, "t": max_tokens, "s": schema,
+                "system": system, "prompt": prompt
+            },
+            option=orjson.OPT_SORT_KEYS
+        )
+        return hashlib.sha256(payload).hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"LLM cache lookup failed: {e}")
+            value = None
+
+        if value is None:
+            self.stats["misses"] += 1
+        else:
+            self.stats["hits"] += 1
+        return value
+
+    async def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        try:
+            await self.backend.set(key, value, ttl or self.ttl)
+        except Exception as e:
+            logger.warning(f"LLM cache store failed: {e}")
+
+    async def clear(self) -> None:
+        await self.backend.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": self.stats["hits"] / total if total else 0.0
+        }
+
+
+class SemanticLLMCache:
+    """
+    Similarity cache that reuses a prior response when a new prompt's embedding
+    is close enough to one already answered by the same provider/model
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[str], Awaitable[List[float]]],
+        threshold: float = 0.92,
+        max_entries: int = 512
+    ):
+        self.embed = embed
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries: Dict[str, Deque[Tuple[List[float], str]]] = {}
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> List[float]:
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    async def lookup(self, namespace: str, prompt: str) -> Tuple[Optional[str], Optional[List[float]]]:
+        """
+        Find the closest cached response for a prompt
+
+        Returns the response (or None) and the prompt embedding so callers can
+        store a fresh response without embedding the prompt twice.
+        """
+        try:
+            embedding = self._normalize(await self.embed(prompt))
+        except Exception as e:
+            logger.warning(f"Semantic cache embedding failed: {e}")
+            return None, None
+
+        best_score = 0.0
+        best_response = None
+        for cached_embedding, response in self._entries.get(namespace, ()):
+            score = sum(a * b for a, b in zip(embedding, cached_embedding))
+            if score > best_score:
+                best_score, best_response = score, response
+
+        if best_response is not None and best_score >= self.threshold:
+            self.stats["hits"] += 1
+            return best_response, embedding
+
+        self.stats["misses"] += 1
+        return None, embedding
+
+    def add(self, namespace: str, embedding: List[float], response: str) -> None:
+        entries = self._entries.get(namespace)
+        if entries is None:
+            entries = self._entries[namespace] = deque(maxlen=self.max_entries)
+        entries.append((embedding, response))
+
+    def clear(self) -> None:
+        self._entries.clear()
@@ -0,0 +1,74 @@
+"""
+LLM Request Scheduler
+Shortest-job-first admission of LLM calls to a bounded number of provider slots
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Tuple
+
+
+class LLMPriorityPool:
+    """
+    Concurrency limiter that admits the cheapest waiting request first
+
+    Works like an asyncio.Semaphore, except that when all slots are busy the
+    waiters are ordered by estimated cost (prompt plus completion tokens)
+    instead of arrival. That way a short selection prompt does not queue behind
+    a long planning prompt. To keep expensive requests from starving, each
+    waiter's cost is offset by its arrival time, so a request that has waited
+    long enough outranks newer, cheaper ones.
+    """
+
+    def __init__(self, concurrency: int, aging_tokens_per_second: float = 1000.0):
+        self.concurrency = max(1, concurrency)
+        self.aging_tokens_per_second = aging_tokens_per_second
+        self._active = 0
+        self._waiters: List[Tuple[float, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    @staticmethod
+    def estimate_cost(prompt: str, max_tokens: int) -> int:
+        """Cheap token estimate: ~4 characters per prompt token plus the completion budget"""
+        return len(prompt) // 4 + max_tokens
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    @asynccontextmanager
+    async def slot(self, cost: float) -> AsyncIterator[None]:
+        """Hold one provider slot for the duration of the block"""
+        await self._acquire(cost)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, cost: float):
+        if self._active < self.concurrency and not self.waiting:
+            self._active += 1
+            return
+
+        priority = cost + time.monotonic() * self.aging_tokens_per_second
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # The slot may have been handed over just before cancellation
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+
+    def _release(self):
+        # Hand the slot straight to the best live waiter; cancelled ones are skipped
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._active -= 1
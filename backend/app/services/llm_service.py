@@ -4,18 +4,28 @@ Handles AI/LLM integration for task processing and MCP server interaction
 """
 
 import asyncio
-import json
 import logging
-from typing import Dict, List, Any, Optional, Union
+import re
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple, Type, Union
 from enum import Enum
+from string import Template
 import httpx
-from openai import AsyncOpenAI
+import orjson
+from openai import AsyncOpenAI, DefaultAioHttpClient
 from anthropic import AsyncAnthropic
+from json_repair import repair_json
+from pydantic import BaseModel
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_random_exponential
 
 from ..core.config import settings
 from ..models.task import Task
 from ..models.mcp_server import MCPServer
 from .mcp_client import mcp_client, MCPClientError
+from .llm_cache import LLMCache, InMemoryLRUBackend, SemanticLLMCache
+from .llm_scheduler import LLMPriorityPool
+from .monitoring_service import monitoring_service
 
 logger = logging.getLogger(__name__)
 
@@ -33,45 +43,345 @@ class LLMServiceError(Exception):
     pass
 
 
+# Temperature used for structured prompts; responses at or below it are cached
+DEFAULT_TEMPERATURE = 0.1
+
+
+# Structured output schemas requested from providers that support them
+class ServerSelection(BaseModel):
+    """Server selection response"""
+    selected_servers: List[int]
+    reasoning: str
+    confidence: str
+
+
+class PlanStep(BaseModel):
+    """Single step of an execution plan"""
+    step: int
+    description: str
+    server_id: int
+    tool_name: str
+    arguments: Dict[str, Any]
+    expected_output: str
+    depends_on: List[int]
+
+
+class ExecutionPlan(BaseModel):
+    """Execution plan response"""
+    plan: List[PlanStep]
+    summary: str
+    estimated_duration: str
+    dependencies: List[str]
+
+
+class ComplexityAnalysis(BaseModel):
+    """Task complexity analysis response"""
+    complexity: str
+    estimated_duration: str
+    required_capabilities: List[str]
+    potential_challenges: List[str]
+    recommended_approach: str
+    resource_requirements: List[str]
+
+
+# Prompt templates, parsed once at import and filled per task.
+# The system message (preamble + task block) is identical for every stage of
+# one task so providers can reuse it as a cached prompt prefix; only the
+# stage-specific instructions go in the user message.
+SYSTEM_PREAMBLE = """You are an AI assistant that helps accomplish tasks using MCP (Model Context Protocol) servers.
+Always respond with a single JSON object matching the format requested by the user.
+"""
+
+TASK_CONTEXT_TMPL = Template("""
+Task Details:
+- Title: ${task_title}
+- Description: ${task_description}
+- Priority: ${task_priority}
+- Parameters: ${task_parameters}
+""")
+
+SERVER_SELECTION_TMPL = Template("""
+Select the most appropriate MCP servers for the task.
+
+Available MCP Servers:
+${servers_json}
+
+Please analyze the task and select the most appropriate MCP servers that could help accomplish this task. Consider:
+1. The task description and requirements
+2. Server capabilities and categories
+3. Relevance to the task domain
+
+Respond with a JSON object containing:
+{
+    "selected_servers": [list of server IDs that are most relevant],
+    "reasoning": "explanation of why these servers were selected",
+    "confidence": "high/medium/low confidence in the selection"
+}
+
+Only select servers that are clearly relevant to the task. If no servers are suitable, return an empty list.
+""")
+
+EXECUTION_PLAN_TMPL = Template("""
+Create an execution plan for the task using the available MCP servers.
+
+Available Servers and Tools:
+${tools_json}
+
+Please create a detailed execution plan that breaks down the task into steps using the available MCP servers and their tools.
+
+Respond with a JSON object containing:
+{
+    "plan": [
+        {
+            "step": 1,
+            "description": "What this step accomplishes",
+            "server_id": "ID of the MCP server to use",
+            "tool_name": "Name of the tool to call",
+            "arguments": {"key": "value"},
+            "expected_output": "What we expect from this step",
+            "depends_on": [list of step numbers that must finish before this one]
+        }
+    ],
+    "summary": "Overall summary of the execution plan",
+    "estimated_duration": "estimated time to complete",
+    "dependencies": ["any external dependencies or requirements"]
+}
+
+Make the plan as detailed and actionable as possible. Each step should be executable using the available tools.
+Steps that do not need another step's output should use an empty "depends_on" list so they can run in parallel.
+""")
+
+TASK_ANALYSIS_PROMPT = """
+Analyze the task and provide insights about its complexity and requirements.
+
+Please analyze and respond with a JSON object containing:
+{
+    "complexity": "low/medium/high",
+    "estimated_duration": "estimated time to complete",
+    "required_capabilities": ["list of capabilities needed"],
+    "potential_challenges": ["list of potential challenges"],
+    "recommended_approach": "suggested approach to tackle this task",
+    "resource_requirements": ["list of resources needed"]
+}
+"""
+
+
+def _dumps_indented(data: Any, default=None) -> str:
+    """Pretty-print JSON for prompts using orjson"""
+    return orjson.dumps(
+        data, default=default, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+    ).decode()
+
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Mock tools offered for servers whose tools cannot be listed, by name keyword
+_MOCK_TOOL_TEMPLATES: Dict[str, Tuple[Dict[str, str], ...]] = {
+    "filesystem": (
+        {"name": "read_file", "description": "Read contents of a file"},
+        {"name": "write_file", "description": "Write content to a file"},
+        {"name": "list_directory", "description": "List files in a directory"},
+    ),
+    "database": (
+        {"name": "execute_query", "description": "Execute SQL query"},
+        {"name": "list_tables", "description": "List database tables"},
+        {"name": "describe_table", "description": "Describe table structure"},
+    ),
+    "browser": (
+        {"name": "navigate", "description": "Navigate to a URL"},
+        {"name": "click_element", "description": "Click on a web element"},
+        {"name": "extract_text", "description": "Extract text from page"},
+    ),
+    "search": (
+        {"name": "search", "description": "Perform search query"},
+        {"name": "get_results", "description": "Get search results"},
+    ),
+}
+
+_MOCK_TOOL_KEYWORDS = {
+    "file": "filesystem",
+    "database": "database",
+    "sql": "database",
+    "browser": "browser",
+    "web": "browser",
+    "search": "search",
+}
+
+_MOCK_TOOL_RE = re.compile("|".join(_MOCK_TOOL_KEYWORDS))
+
+_CODE_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*```\s*$", re.DOTALL)
+
+
+def _parse_json_response(response: str) -> Any:
+    """
+    Parse a JSON object from an LLM response
+    
+    Strips Markdown code fences and, when strict parsing fails, repairs common
+    defects such as trailing commas or truncated output instead of discarding
+    the response. Raises orjson.JSONDecodeError if nothing can be salvaged.
+    """
+    match = _CODE_FENCE_RE.match(response)
+    if match:
+        response = match.group(1)
+    
+    try:
+        return orjson.loads(response)
+    except orjson.JSONDecodeError:
+        repaired = repair_json(response)
+        result = orjson.loads(repaired)
+        monitoring_service.record_llm_response_repaired()
+        logger.info("Repaired malformed JSON in LLM response")
+        return result
+
+
+def _is_retryable_llm_error(exc: BaseException) -> bool:
+    """Retry rate limits and server errors found anywhere in the exception chain"""
+    while exc is not None:
+        status_code = getattr(exc, "status_code", None)
+        if status_code is None:
+            status_code = getattr(getattr(exc, "response", None), "status_code", None)
+        if status_code == 429 or (isinstance(status_code, int) and status_code >= 500):
+            return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
 class LLMService:
     """
     Service for handling AI/LLM interactions and task processing
     """
     
+    # Connections beyond the provider slots, for calls made outside them
+    # (model listings, embeddings)
+    POOL_HEADROOM = 4
+    
     def __init__(self):
-        self.openai_client = None
-        self.anthropic_client = None
+        # Provider SDK clients are built on first use, see the properties below
+        self._openai_client: Optional[AsyncOpenAI] = None
+        self._anthropic_client: Optional[AsyncAnthropic] = None
+        self._openrouter_client: Optional[AsyncOpenAI] = None
         self.ollama_base_url = getattr(settings, 'OLLAMA_BASE_URL', 'http://localhost:11434')
         self.openrouter_api_key = getattr(settings, 'OPENROUTER_API_KEY', None)
+        self._http: Optional[httpx.AsyncClient] = None
+        self._openai_http: Optional[httpx.AsyncClient] = None
         
-        # Initialize clients based on available API keys
-        self._initialize_clients()
+        # Prompt fragments keyed by (server_id, last_updated)
+        self._server_json_cache: OrderedDict = OrderedDict()
+        self._tools_json_cache: OrderedDict = OrderedDict()
+        # In-flight LLM calls keyed by response cache key
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Ollama model listings keyed by base URL: (fetched_at, models)
+        self._models_cache: Dict[str, Tuple[float, List[str]]] = {}
+        self.response_cache = LLMCache(
+            backend=InMemoryLRUBackend(max_entries=settings.LLM_CACHE_MAX_ENTRIES),
+            ttl=settings.LLM_CACHE_TTL_SECONDS
+        )
+        self.semantic_cache = SemanticLLMCache(
+            embed=self._embed_prompt,
+            threshold=settings.LLM_SEMANTIC_CACHE_THRESHOLD
+        )
+        
+        # Per-provider slots, admitting the shortest waiting request first
+        self._pools = {
+            LLMProvider.OPENAI: LLMPriorityPool(settings.OPENAI_CONCURRENCY),
+            LLMProvider.ANTHROPIC: LLMPriorityPool(settings.ANTHROPIC_CONCURRENCY),
+            LLMProvider.OPENROUTER: LLMPriorityPool(settings.OPENROUTER_CONCURRENCY),
+            LLMProvider.OLLAMA: LLMPriorityPool(settings.OLLAMA_CONCURRENCY),
+        }
     
-    def _initialize_clients(self):
-        """Initialize LLM clients based on available configuration"""
-        try:
-            # OpenAI client
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """Shared keep-alive HTTP client for direct provider calls, created on first use"""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                limits=self._pool_limits(settings.OLLAMA_CONCURRENCY),
+                timeout=60.0
+            )
+        return self._http
+    
+    def _pool_limits(self, concurrency: int) -> httpx.Limits:
+        """Connection pool sized to the provider slots it serves, unless overridden"""
+        max_connections = settings.HTTPX_MAX_CONN or concurrency + self.POOL_HEADROOM
+        return httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=settings.HTTPX_KEEPALIVE or max_connections
+        )
+    
+    async def aclose(self):
+        """Close the shared HTTP clients"""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        if self._openai_http is not None:
+            await self._openai_http.aclose()
+            self._openai_http = None
+            # Both SDK clients hold the closed transport; rebuild them on next use
+            self._openai_client = None
+            self._openrouter_client = None
+    
+    def _openai_transport(self) -> Optional[httpx.AsyncClient]:
+        """
+        aiohttp-backed transport shared by the OpenAI-compatible clients
+        
+        aiohttp's connector keeps latency flat under high fan-out where the
+        default httpx transport stalls. Falls back to the SDK default when the
+        openai[aiohttp] extra is not installed.
+        """
+        if self._openai_http is None:
+            try:
+                # Shared by the OpenAI and OpenRouter clients
+                self._openai_http = DefaultAioHttpClient(
+                    limits=self._pool_limits(
+                        settings.OPENAI_CONCURRENCY + settings.OPENROUTER_CONCURRENCY
+                    )
+                )
+            except Exception as e:
+                logger.warning(f"aiohttp transport unavailable, using default: {e}")
+        return self._openai_http
+    
+    @property
+    def openai_client(self) -> Optional[AsyncOpenAI]:
+        """OpenAI client, or None when no API key is configured"""
+        if self._openai_client is None:
             openai_api_key = getattr(settings, 'OPENAI_API_KEY', None)
             if openai_api_key:
-                self.openai_client = AsyncOpenAI(api_key=openai_api_key)
-                logger.info("OpenAI client initialized")
-            
-            # Anthropic client
+                try:
+                    self._openai_client = AsyncOpenAI(
+                        api_key=openai_api_key,
+                        http_client=self._openai_transport()
+                    )
+                    logger.info("OpenAI client initialized")
+                except Exception as e:
+                    logger.error(f"Error initializing OpenAI client: {e}")
+        return self._openai_client
+    
+    @property
+    def anthropic_client(self) -> Optional[AsyncAnthropic]:
+        """Anthropic client, or None when no API key is configured"""
+        if self._anthropic_client is None:
             anthropic_api_key = getattr(settings, 'ANTHROPIC_API_KEY', None)
             if anthropic_api_key:
-                self.anthropic_client = AsyncAnthropic(api_key=anthropic_api_key)
-                logger.info("Anthropic client initialized")
-            
-            # OpenRouter client (uses OpenAI-compatible API)
-            if self.openrouter_api_key:
-                self.openrouter_client = AsyncOpenAI(
+                try:
+                    self._anthropic_client = AsyncAnthropic(api_key=anthropic_api_key)
+                    logger.info("Anthropic client initialized")
+                except Exception as e:
+                    logger.error(f"Error initializing Anthropic client: {e}")
+        return self._anthropic_client
+    
+    @property
+    def openrouter_client(self) -> Optional[AsyncOpenAI]:
+        """OpenRouter client (OpenAI-compatible API), or None when no API key is configured"""
+        if self._openrouter_client is None and self.openrouter_api_key:
+            try:
+                self._openrouter_client = AsyncOpenAI(
                     api_key=self.openrouter_api_key,
-                    base_url="https://openrouter.ai/api/v1"
+                    base_url="https://openrouter.ai/api/v1",
+                    http_client=self._openai_transport()
                 )
                 logger.info("OpenRouter client initialized")
-            
-        except Exception as e:
-            logger.error(f"Error initializing LLM clients: {e}")
+            except Exception as e:
+                logger.error(f"Error initializing OpenRouter client: {e}")
+        return self._openrouter_client
     
     async def process_task_with_llm(
         self, 
@@ -95,25 +405,51 @@ class LLMService:
         try:
             logger.info(f"Processing task {task.id} with LLM using {provider}/{model}")
             
-            # Step 1: Analyze task and select appropriate MCP servers
-            selected_servers = await self._select_servers_for_task(
-                task, available_servers, provider, model
-            )
+            # Deterministic cases never reach the LLM
+            direct_servers, reason = self._direct_server_selection(task, available_servers)
+            if reason is not None:
+                logger.info(f"mfee.direct.{reason} task={task.id}")
+            if reason in ("malformed", "no_servers"):
+                return {
+                    "success": False,
+                    "error": (
+                        "Task has no title or description"
+                        if reason == "malformed" else "No MCP servers available"
+                    ),
+                    "task_id": task.id
+                }
+            
+            # Steps 1-2: Select appropriate MCP servers and generate the execution
+            # plan while complexity is analyzed alongside. The TaskGroup cancels
+            # the sibling if either fails so no call is orphaned.
+            execution_plan = None
+            async with asyncio.TaskGroup() as tg:
+                analysis = tg.create_task(
+                    self.analyze_task_complexity(task, provider, model)
+                )
+                if direct_servers is None:
+                    selected_servers = await self._select_servers_for_task(
+                        task, available_servers, provider, model
+                    )
+                else:
+                    selected_servers = direct_servers
+                
+                if selected_servers:
+                    execution_plan = await self._generate_execution_plan(
+                        task, selected_servers, provider, model
+                    )
             
             if not selected_servers:
                 return {
                     "success": False,
                     "error": "No suitable MCP servers found for this task",
-                    "task_id": task.id
+                    "task_id": task.id,
+                    "complexity_analysis": analysis.result()
                 }
             
-            # Step 2: Generate execution plan
-            execution_plan = await self._generate_execution_plan(
-                task, selected_servers, provider, model
-            )
-            
             # Step 3: Execute the plan
             result = await self._execute_plan(task, execution_plan, selected_servers)
+            result["complexity_analysis"] = analysis.result()
             
             return result
             
@@ -125,6 +461,49 @@ class LLMService:
                 "task_id": task.id
             }
     
+    def _direct_server_selection(
+        self,
+        task: Task,
+        available_servers: List[MCPServer]
+    ) -> Tuple[Optional[List[MCPServer]], Optional[str]]:
+        """
+        Resolve server selection without the LLM when the answer is deterministic
+        
+        Returns the servers to use (None when the LLM must decide) and the reason
+        for the short-circuit: "malformed" and "no_servers" mean the task cannot
+        run at all, "assigned_server", "single_server" and "capability_match"
+        mean selection was resolved directly.
+        """
+        if not (task.title or "").strip() and not (task.description or "").strip():
+            return None, "malformed"
+        if not available_servers:
+            return None, "no_servers"
+        
+        if task.assigned_server_id is not None:
+            assigned = [s for s in available_servers if s.id == task.assigned_server_id]
+            if assigned:
+                return assigned, "assigned_server"
+        
+        if len(available_servers) == 1:
+            return list(available_servers), "single_server"
+        
+        # A capability matches when all of its words appear in the task title
+        title_words = set(_WORD_RE.findall((task.title or "").lower()))
+        matches = [
+            server for server in available_servers
+            if any(
+                words and words <= title_words
+                for words in (
+                    set(_WORD_RE.findall(str(capability).lower()))
+                    for capability in (server.capabilities or [])
+                )
+            )
+        ]
+        if len(matches) == 1:
+            return matches, "capability_match"
+        
+        return None, None
+    
     async def _select_servers_for_task(
         self,
         task: Task,
@@ -135,54 +514,25 @@ class LLMService:
         """Select the most appropriate MCP servers for a task"""
         try:
             # Create server descriptions for the LLM
-            server_descriptions = []
-            for server in available_servers:
-                desc = {
-                    "id": server.id,
-                    "name": server.name,
-                    "description": server.description or "No description available",
-                    "capabilities": server.capabilities or [],
-                    "categories": server.categories or [],
-                    "package_manager": server.package_manager,
-                    "url": server.url
-                }
-                server_descriptions.append(desc)
+            server_descriptions = "[\n" + ",\n".join(
+                self._server_description_json(server) for server in available_servers
+            ) + "\n]"
             
             # Create prompt for server selection
-            prompt = f"""
-You are an AI assistant that helps select the most appropriate MCP (Model Context Protocol) servers for a given task.
-
-Task Details:
-- Title: {task.title}
-- Description: {task.description}
-- Priority: {task.priority}
-- Parameters: {json.dumps(task.parameters or {}, indent=2)}
-
-Available MCP Servers:
-{json.dumps(server_descriptions, indent=2)}
-
-Please analyze the task and select the most appropriate MCP servers that could help accomplish this task. Consider:
-1. The task description and requirements
-2. Server capabilities and categories
-3. Relevance to the task domain
-
-Respond with a JSON object containing:
-{{
-    "selected_servers": [list of server IDs that are most relevant],
-    "reasoning": "explanation of why these servers were selected",
-    "confidence": "high/medium/low confidence in the selection"
-}}
-
-Only select servers that are clearly relevant to the task. If no servers are suitable, return an empty list.
-"""
+            prompt = SERVER_SELECTION_TMPL.substitute(servers_json=server_descriptions)
             
             # Get LLM response
-            response = await self._call_llm(prompt, provider, model)
+            response = await self._call_llm(
+                prompt, provider, model,
+                semantic_cache=True,
+                schema=ServerSelection,
+                system=self._task_system_prompt(task)
+            )
             
             # Parse response
             try:
-                result = json.loads(response)
-                selected_ids = result.get("selected_servers", [])
+                result = _parse_json_response(response)
+                selected_ids = set(result.get("selected_servers", []))
                 
                 # Filter servers by selected IDs
                 selected_servers = [
@@ -193,7 +543,7 @@ Only select servers that are clearly relevant to the task. If no servers are sui
                 logger.info(f"Selected {len(selected_servers)} servers for task {task.id}: {result.get('reasoning', '')}")
                 return selected_servers
                 
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 logger.error(f"Failed to parse LLM response for server selection: {response}")
                 return []
                 
@@ -210,71 +560,34 @@ Only select servers that are clearly relevant to the task. If no servers are sui
     ) -> Dict[str, Any]:
         """Generate an execution plan for the task using selected servers"""
         try:
-            # Get available tools from selected servers
-            server_tools = {}
-            for server in selected_servers:
-                try:
-                    # Try to connect and get tools
-                    connected = await mcp_client.connect_to_server(server)
-                    if connected:
-                        tools = await mcp_client.list_tools(server.id)
-                        server_tools[server.id] = {
-                            "server": server,
-                            "tools": tools
-                        }
-                except Exception as e:
-                    logger.warning(f"Could not get tools from server {server.name}: {e}")
-                    # Use mock tools based on server description
-                    server_tools[server.id] = {
-                        "server": server,
-                        "tools": self._generate_mock_tools(server)
-                    }
+            # Get available tools from selected servers concurrently
+            results = await asyncio.gather(
+                *[self._tools_for(server) for server in selected_servers],
+                return_exceptions=True
+            )
+            server_tools = "{\n" + ",\n".join(
+                self._server_tools_json(server, tools)
+                for server, tools in zip(selected_servers, results)
+                if not isinstance(tools, BaseException) and tools is not None
+            ) + "\n}"
             
             # Create prompt for execution plan
-            prompt = f"""
-You are an AI assistant that creates execution plans for tasks using MCP (Model Context Protocol) servers.
-
-Task Details:
-- Title: {task.title}
-- Description: {task.description}
-- Priority: {task.priority}
-- Parameters: {json.dumps(task.parameters or {}, indent=2)}
-
-Available Servers and Tools:
-{json.dumps(server_tools, indent=2, default=str)}
-
-Please create a detailed execution plan that breaks down the task into steps using the available MCP servers and their tools.
-
-Respond with a JSON object containing:
-{{
-    "plan": [
-        {{
-            "step": 1,
-            "description": "What this step accomplishes",
-            "server_id": "ID of the MCP server to use",
-            "tool_name": "Name of the tool to call",
-            "arguments": {{"key": "value"}},
-            "expected_output": "What we expect from this step"
-        }}
-    ],
-    "summary": "Overall summary of the execution plan",
-    "estimated_duration": "estimated time to complete",
-    "dependencies": ["any external dependencies or requirements"]
-}}
-
-Make the plan as detailed and actionable as possible. Each step should be executable using the available tools.
-"""
+            prompt = EXECUTION_PLAN_TMPL.substitute(tools_json=server_tools)
             
             # Get LLM response
-            response = await self._call_llm(prompt, provider, model)
+            response = await self._call_llm(
+                prompt, provider, model,
+                schema=ExecutionPlan,
+                system=self._task_system_prompt(task)
+            )
             
             # Parse response
             try:
-                plan = json.loads(response)
+                plan = _parse_json_response(response)
                 logger.info(f"Generated execution plan for task {task.id}: {plan.get('summary', '')}")
                 return plan
                 
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 logger.error(f"Failed to parse LLM response for execution plan: {response}")
                 return {"plan": [], "summary": "Failed to generate plan"}
                 
@@ -282,39 +595,81 @@ Make the plan as detailed and actionable as possible. Each step should be execut
             logger.error(f"Error generating execution plan for task {task.id}: {e}")
             return {"plan": [], "summary": f"Error: {e}"}
     
+    def _server_description_json(self, server: MCPServer) -> str:
+        """Serialized server description, memoized until the server row changes"""
+        key = (server.id, server.last_updated)
+        cached = self._server_json_cache.get(key)
+        if cached is None:
+            cached = _dumps_indented({
+                "id": server.id,
+                "name": server.name,
+                "description": server.description or "No description available",
+                "capabilities": server.capabilities or [],
+                "categories": server.categories or [],
+                "package_manager": server.package_manager,
+                "url": server.url
+            })
+            self._remember(self._server_json_cache, key, cached)
+        else:
+            self._server_json_cache.move_to_end(key)
+        return cached
+    
+    def _server_tools_json(self, server: MCPServer, tools: List[Dict[str, Any]]) -> str:
+        """Serialized server/tools entry, reused while the server's tool list is unchanged"""
+        key = (server.id, server.last_updated)
+        cached = self._tools_json_cache.get(key)
+        if cached is None or cached[0] != tools:
+            fragment = f'"{server.id}": ' + _dumps_indented(
+                {"server": server, "tools": tools}, default=str
+            )
+            cached = (tools, fragment)
+            self._remember(self._tools_json_cache, key, cached)
+        else:
+            self._tools_json_cache.move_to_end(key)
+        return cached[1]
+    
+    @staticmethod
+    def _remember(cache: "OrderedDict", key: Any, value: Any, max_entries: int = 1024):
+        """Insert into a bounded LRU dict"""
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > max_entries:
+            cache.popitem(last=False)
+    
+    async def _tools_for(self, server: MCPServer) -> Optional[List[Dict[str, Any]]]:
+        """
+        List a server's tools, connecting first if needed; falls back to mock tools on error
+        
+        A live connection is reused, and the listing comes from the MCP
+        client's own tool cache, which connect and disconnect invalidate.
+        """
+        try:
+            connection = mcp_client.active_connections.get(server.id)
+            process = connection.get("process") if connection else None
+            connected = (
+                (connection is not None and (process is None or process.returncode is None))
+                or await mcp_client.connect_to_server(server)
+            )
+            if connected:
+                return await mcp_client.list_tools(server.id)
+            return None
+        except Exception as e:
+            logger.warning(f"Could not get tools from server {server.name}: {e}")
+            # Use mock tools based on server description
+            return self._generate_mock_tools(server)
+    
     def _generate_mock_tools(self, server: MCPServer) -> List[Dict[str, Any]]:
         """Generate mock tools based on server description and name"""
-        mock_tools = []
-        
-        # Generate tools based on server name and description
-        server_name_lower = server.name.lower()
-        
-        if "filesystem" in server_name_lower or "file" in server_name_lower:
-            mock_tools.extend([
-                {"name": "read_file", "description": "Read contents of a file"},
-                {"name": "write_file", "description": "Write content to a file"},
-                {"name": "list_directory", "description": "List files in a directory"}
-            ])
-        
-        if "database" in server_name_lower or "sql" in server_name_lower:
-            mock_tools.extend([
-                {"name": "execute_query", "description": "Execute SQL query"},
-                {"name": "list_tables", "description": "List database tables"},
-                {"name": "describe_table", "description": "Describe table structure"}
-            ])
-        
-        if "browser" in server_name_lower or "web" in server_name_lower:
-            mock_tools.extend([
-                {"name": "navigate", "description": "Navigate to a URL"},
-                {"name": "click_element", "description": "Click on a web element"},
-                {"name": "extract_text", "description": "Extract text from page"}
-            ])
-        
-        if "search" in server_name_lower:
-            mock_tools.extend([
-                {"name": "search", "description": "Perform search query"},
-                {"name": "get_results", "description": "Get search results"}
-            ])
+        # Single pass over the name; categories keep their template order
+        categories = {
+            _MOCK_TOOL_KEYWORDS[match.group(0)]
+            for match in _MOCK_TOOL_RE.finditer(server.name.lower())
+        }
+        mock_tools = [
+            tool
+            for category, tools in _MOCK_TOOL_TEMPLATES.items() if category in categories
+            for tool in tools
+        ]
         
         # Default tools if none match
         if not mock_tools:
@@ -331,60 +686,32 @@ Make the plan as detailed and actionable as possible. Each step should be execut
         execution_plan: Dict[str, Any],
         selected_servers: List[MCPServer]
     ) -> Dict[str, Any]:
-        """Execute the generated plan"""
+        """Execute the generated plan, running independent steps concurrently"""
         try:
             plan_steps = execution_plan.get("plan", [])
             results = []
             
             logger.info(f"Executing plan with {len(plan_steps)} steps for task {task.id}")
             
-            for step in plan_steps:
-                step_num = step.get("step", 0)
-                server_id = step.get("server_id")
-                tool_name = step.get("tool_name")
-                arguments = step.get("arguments", {})
-                
-                logger.info(f"Executing step {step_num}: {step.get('description', '')}")
-                
-                try:
-                    # Find the server
-                    server = next((s for s in selected_servers if s.id == server_id), None)
-                    if not server:
-                        results.append({
-                            "step": step_num,
-                            "success": False,
-                            "error": f"Server {server_id} not found"
-                        })
-                        continue
-                    
-                    # Execute the tool
-                    tool_result = await mcp_client.execute_tool(server_id, tool_name, arguments)
-                    
-                    results.append({
-                        "step": step_num,
-                        "success": True,
-                        "result": tool_result,
-                        "server": server.name,
-                        "tool": tool_name
-                    })
-                    
-                except MCPClientError as e:
-                    logger.error(f"MCP error in step {step_num}: {e}")
-                    results.append({
-                        "step": step_num,
-                        "success": False,
-                        "error": str(e),
-                        "server": server.name if server else "unknown",
-                        "tool": tool_name
-                    })
-                
-                except Exception as e:
-                    logger.error(f"Error in step {step_num}: {e}")
-                    results.append({
-                        "step": step_num,
-                        "success": False,
-                        "error": str(e)
-                    })
+            step_limit = asyncio.Semaphore(settings.MAX_PARALLEL_PLAN_STEPS)
+            server_by_id = {server.id: server for server in selected_servers}
+            
+            async def run_limited(step: Dict[str, Any]) -> Dict[str, Any]:
+                async with step_limit:
+                    return await self._run_step(step, server_by_id)
+            
+            waves, unresolved = self._plan_waves(plan_steps)
+            for wave in waves:
+                results.extend(await asyncio.gather(*[run_limited(step) for step in wave]))
+            
+            for step in unresolved:
+                results.append({
+                    "step": step.get("step", 0),
+                    "success": False,
+                    "error": "Step has circular or unresolvable dependencies"
+                })
+            
+            results.sort(key=lambda r: r["step"] if isinstance(r["step"], (int, float)) else 0)
             
             # Summarize results
             successful_steps = sum(1 for r in results if r.get("success", False))
@@ -408,31 +735,284 @@ Make the plan as detailed and actionable as possible. Each step should be execut
                 "error": str(e)
             }
     
+    def _plan_waves(
+        self,
+        plan_steps: List[Dict[str, Any]]
+    ) -> Tuple[List[List[Dict[str, Any]]], List[Dict[str, Any]]]:
+        """
+        Group plan steps into waves using Kahn's topological sort
+        
+        Steps without a `depends_on` list depend on the previous step, which keeps
+        plans generated before the field existed strictly sequential. Returns the
+        waves and any steps left over because of cycles.
+        """
+        step_ids = [step.get("step", index + 1) for index, step in enumerate(plan_steps)]
+        known_ids = set(step_ids)
+        
+        indegree: Dict[int, int] = {}
+        dependents: Dict[int, List[int]] = {index: [] for index in range(len(plan_steps))}
+        index_by_id = {step_id: index for index, step_id in enumerate(step_ids)}
+        
+        for index, step in enumerate(plan_steps):
+            depends_on = step.get("depends_on")
+            if depends_on is None:
+                depends_on = [step_ids[index - 1]] if index > 0 else []
+            elif not isinstance(depends_on, list):
+                depends_on = [depends_on]
+            
+            parents = {
+                index_by_id[dep] for dep in depends_on
+                if dep in known_ids and index_by_id[dep] != index
+            }
+            indegree[index] = len(parents)
+            for parent in parents:
+                dependents[parent].append(index)
+        
+        waves = []
+        ready = [index for index, degree in indegree.items() if degree == 0]
+        while ready:
+            waves.append([plan_steps[index] for index in ready])
+            next_ready = []
+            for index in ready:
+                for child in dependents[index]:
+                    indegree[child] -= 1
+                    if indegree[child] == 0:
+                        next_ready.append(child)
+            ready = next_ready
+        
+        unresolved = [plan_steps[index] for index, degree in indegree.items() if degree > 0]
+        return waves, unresolved
+    
+    async def _run_step(self, step: Dict[str, Any], server_by_id: Dict[int, MCPServer]) -> Dict[str, Any]:
+        """Execute a single plan step and describe its outcome"""
+        step_num = step.get("step", 0)
+        server_id = step.get("server_id")
+        tool_name = step.get("tool_name")
+        arguments = step.get("arguments", {})
+        server = None
+        
+        logger.info(f"Executing step {step_num}: {step.get('description', '')}")
+        
+        try:
+            # Find the server
+            server = server_by_id.get(server_id)
+            if not server:
+                return {
+                    "step": step_num,
+                    "success": False,
+                    "error": f"Server {server_id} not found"
+                }
+            
+            # Execute the tool
+            tool_result = await mcp_client.execute_tool(server_id, tool_name, arguments)
+            
+            return {
+                "step": step_num,
+                "success": True,
+                "result": tool_result,
+                "server": server.name,
+                "tool": tool_name
+            }
+            
+        except MCPClientError as e:
+            logger.error(f"MCP error in step {step_num}: {e}")
+            return {
+                "step": step_num,
+                "success": False,
+                "error": str(e),
+                "server": server.name if server else "unknown",
+                "tool": tool_name
+            }
+        
+        except Exception as e:
+            logger.error(f"Error in step {step_num}: {e}")
+            return {
+                "step": step_num,
+                "success": False,
+                "error": str(e)
+            }
+    
     async def _call_llm(
         self,
         prompt: str,
         provider: LLMProvider,
         model: str,
-        max_tokens: int = 4000
+        max_tokens: int = 4000,
+        temperature: float = DEFAULT_TEMPERATURE,
+        use_cache: bool = True,
+        semantic_cache: bool = False,
+        schema: Optional[Type[BaseModel]] = None,
+        system: Optional[str] = None
     ) -> str:
-        """Call the specified LLM provider"""
+        """
+        Call the specified LLM provider
+        
+        When `schema` is given, providers that support it are asked for output
+        constrained to that JSON schema (response_format, forced tool use or
+        Ollama's format field); the response is still returned as a JSON string.
+        `system` is sent as a separate system message so its prefix can be
+        cached provider-side across calls.
+        """
+        cacheable = use_cache and settings.LLM_CACHE_ENABLED and temperature <= DEFAULT_TEMPERATURE
+        cache_key = None
+        if cacheable:
+            cache_key = LLMCache.make_key(
+                provider.value, model, max_tokens, prompt,
+                schema=schema.__name__ if schema else None,
+                system=system
+            )
+            cached = await self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            
+            # Single-flight: identical concurrent requests share one provider call.
+            # The shared task is shielded so one caller's cancellation doesn't
+            # abort it for the others.
+            inflight = self._inflight.get(cache_key)
+            if inflight is None:
+                inflight = asyncio.ensure_future(self._fetch_llm(
+                    prompt, provider, model, max_tokens, temperature,
+                    cache_key, semantic_cache, schema, system
+                ))
+                self._inflight[cache_key] = inflight
+                inflight.add_done_callback(
+                    lambda task, key=cache_key: self._finish_inflight(key, task)
+                )
+            return await asyncio.shield(inflight)
+        
+        return await self._fetch_llm(
+            prompt, provider, model, max_tokens, temperature,
+            None, False, schema, system
+        )
+    
+    def _finish_inflight(self, cache_key: str, task: asyncio.Future):
+        """Forget a completed single-flight call, retrieving its error if nobody awaited it"""
+        if self._inflight.get(cache_key) is task:
+            del self._inflight[cache_key]
+        if not task.cancelled():
+            task.exception()
+    
+    async def _fetch_llm(
+        self,
+        prompt: str,
+        provider: LLMProvider,
+        model: str,
+        max_tokens: int,
+        temperature: float,
+        cache_key: Optional[str],
+        semantic_cache: bool,
+        schema: Optional[Type[BaseModel]],
+        system: Optional[str]
+    ) -> str:
+        """Semantic cache lookup, then the provider call with retries; stores the response"""
+        # Near-duplicate prompts are only reused within the same provider/model
+        semantic_namespace = None
+        embedding = None
+        if cache_key is not None and semantic_cache and self._semantic_cache_available():
+            semantic_namespace = f"{provider.value}:{model}:{max_tokens}:{schema.__name__ if schema else ''}"
+            cached, embedding = await self.semantic_cache.lookup(
+                semantic_namespace, f"{system}\n{prompt}" if system else prompt
+            )
+            if cached is not None:
+                return cached
+        
         try:
-            if provider == LLMProvider.OPENROUTER:
-                return await self._call_openrouter(prompt, model, max_tokens)
-            elif provider == LLMProvider.OPENAI:
-                return await self._call_openai(prompt, model, max_tokens)
-            elif provider == LLMProvider.ANTHROPIC:
-                return await self._call_anthropic(prompt, model, max_tokens)
-            elif provider == LLMProvider.OLLAMA:
-                return await self._call_ollama(prompt, model, max_tokens)
-            else:
+            if provider not in self._pools:
                 raise LLMServiceError(f"Unsupported provider: {provider}")
+            cost = LLMPriorityPool.estimate_cost(
+                f"{system}{prompt}" if system else prompt, max_tokens
+            )
+            
+            async for attempt in AsyncRetrying(
+                retry=retry_if_exception(_is_retryable_llm_error),
+                stop=stop_after_attempt(settings.LLM_MAX_RETRIES),
+                wait=wait_random_exponential(multiplier=1, max=20),
+                reraise=True
+            ):
+                with attempt:
+                    # Hold the provider slot only for the request, not the backoff
+                    async with self._pools[provider].slot(cost):
+                        response = await self._dispatch_llm(
+                            prompt, provider, model, max_tokens, temperature, schema, system
+                        )
                 
         except Exception as e:
             logger.error(f"Error calling LLM {provider}/{model}: {e}")
             raise LLMServiceError(f"LLM call failed: {e}")
+        
+        if cache_key is not None and response:
+            await self.response_cache.set(cache_key, response)
+        if embedding is not None and response:
+            self.semantic_cache.add(semantic_namespace, embedding, response)
+        return response
+    
+    async def _dispatch_llm(
+        self,
+        prompt: str,
+        provider: LLMProvider,
+        model: str,
+        max_tokens: int,
+        temperature: float,
+        schema: Optional[Type[BaseModel]] = None,
+        system: Optional[str] = None
+    ) -> str:
+        """Route a completion request to the provider-specific wrapper"""
+        args = (prompt, model, max_tokens, temperature, schema, system)
+        if provider == LLMProvider.OPENROUTER:
+            return await self._call_openrouter(*args)
+        elif provider == LLMProvider.OPENAI:
+            return await self._call_openai(*args)
+        elif provider == LLMProvider.ANTHROPIC:
+            return await self._call_anthropic(*args)
+        elif provider == LLMProvider.OLLAMA:
+            return await self._call_ollama(*args)
+        raise LLMServiceError(f"Unsupported provider: {provider}")
+    
+    @staticmethod
+    def _chat_messages(prompt: str, system: Optional[str] = None) -> List[Dict[str, str]]:
+        """Chat messages with the optional system prefix first"""
+        messages = [{"role": "system", "content": system}] if system else []
+        messages.append({"role": "user", "content": prompt})
+        return messages
+    
+    @staticmethod
+    def _openai_response_format(schema: Optional[Type[BaseModel]]) -> Dict[str, Any]:
+        """JSON-schema response_format for OpenAI-compatible chat completions"""
+        if schema is None:
+            return {}
+        # Plan steps carry free-form tool arguments, which strict mode cannot express
+        return {
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": schema.__name__,
+                    "schema": schema.model_json_schema(),
+                    "strict": False
+                }
+            }
+        }
+    
+    def _semantic_cache_available(self) -> bool:
+        """Semantic caching needs an embeddings-capable client"""
+        return settings.LLM_SEMANTIC_CACHE_ENABLED and self.openai_client is not None
+    
+    async def _embed_prompt(self, prompt: str) -> List[float]:
+        """Embed a prompt for semantic cache lookups"""
+        response = await self.openai_client.embeddings.create(
+            model=settings.LLM_EMBEDDING_MODEL,
+            input=prompt
+        )
+        return response.data[0].embedding
     
-    async def _call_openrouter(self, prompt: str, model: str, max_tokens: int) -> str:
+    async def _call_openrouter(
+        self,
+        prompt: str,
+        model: str,
+        max_tokens: int,
+        temperature: float = DEFAULT_TEMPERATURE,
+        schema: Optional[Type[BaseModel]] = None,
+        system: Optional[str] = None
+    ) -> str:
         """Call OpenRouter API"""
         if not self.openrouter_api_key:
             raise LLMServiceError("OpenRouter API key not configured")
@@ -440,9 +1020,10 @@ Make the plan as detailed and actionable as possible. Each step should be execut
         try:
             response = await self.openrouter_client.chat.completions.create(
                 model=model,
-                messages=[{"role": "user", "content": prompt}],
+                messages=self._chat_messages(prompt, system),
                 max_tokens=max_tokens,
-                temperature=0.1
+                temperature=temperature,
+                **self._openai_response_format(schema)
             )
             
             return response.choices[0].message.content
@@ -451,7 +1032,15 @@ Make the plan as detailed and actionable as possible. Each step should be execut
             logger.error(f"OpenRouter API error: {e}")
             raise LLMServiceError(f"OpenRouter call failed: {e}")
     
-    async def _call_openai(self, prompt: str, model: str, max_tokens: int) -> str:
+    async def _call_openai(
+        self,
+        prompt: str,
+        model: str,
+        max_tokens: int,
+        temperature: float = DEFAULT_TEMPERATURE,
+        schema: Optional[Type[BaseModel]] = None,
+        system: Optional[str] = None
+    ) -> str:
         """Call OpenAI API"""
         if not self.openai_client:
             raise LLMServiceError("OpenAI client not initialized")
@@ -459,9 +1048,10 @@ Make the plan as detailed and actionable as possible. Each step should be execut
         try:
             response = await self.openai_client.chat.completions.create(
                 model=model,
-                messages=[{"role": "user", "content": prompt}],
+                messages=self._chat_messages(prompt, system),
                 max_tokens=max_tokens,
-                temperature=0.1
+                temperature=temperature,
+                **self._openai_response_format(schema)
             )
             
             return response.choices[0].message.content
@@ -470,53 +1060,126 @@ Make the plan as detailed and actionable as possible. Each step should be execut
             logger.error(f"OpenAI API error: {e}")
             raise LLMServiceError(f"OpenAI call failed: {e}")
     
-    async def _call_anthropic(self, prompt: str, model: str, max_tokens: int) -> str:
+    async def _call_anthropic(
+        self,
+        prompt: str,
+        model: str,
+        max_tokens: int,
+        temperature: float = DEFAULT_TEMPERATURE,
+        schema: Optional[Type[BaseModel]] = None,
+        system: Optional[str] = None
+    ) -> str:
         """Call Anthropic API"""
         if not self.anthropic_client:
             raise LLMServiceError("Anthropic client not initialized")
         
         try:
+            # Structured output is obtained by forcing a single tool call
+            tool_kwargs = {}
+            if schema is not None:
+                tool_kwargs = {
+                    "tools": [{
+                        "name": "emit_result",
+                        "description": f"Return the {schema.__name__} result",
+                        "input_schema": schema.model_json_schema()
+                    }],
+                    "tool_choice": {"type": "tool", "name": "emit_result"}
+                }
+            
+            # Mark the shared system prefix as cacheable across prompt stages
+            if system:
+                tool_kwargs["system"] = [{
+                    "type": "text",
+                    "text": system,
+                    "cache_control": {"type": "ephemeral"}
+                }]
+            
             response = await self.anthropic_client.messages.create(
                 model=model,
                 max_tokens=max_tokens,
-                temperature=0.1,
-                messages=[{"role": "user", "content": prompt}]
+                temperature=temperature,
+                messages=[{"role": "user", "content": prompt}],
+                **tool_kwargs
             )
             
+            for block in response.content:
+                if block.type == "tool_use":
+                    return orjson.dumps(block.input).decode()
             return response.content[0].text
             
         except Exception as e:
             logger.error(f"Anthropic API error: {e}")
             raise LLMServiceError(f"Anthropic call failed: {e}")
     
-    async def _call_ollama(self, prompt: str, model: str, max_tokens: int) -> str:
+    async def _call_ollama(
+        self,
+        prompt: str,
+        model: str,
+        max_tokens: int,
+        temperature: float = DEFAULT_TEMPERATURE,
+        schema: Optional[Type[BaseModel]] = None,
+        system: Optional[str] = None
+    ) -> str:
         """Call Ollama API"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.ollama_base_url}/api/generate",
-                    json={
-                        "model": model,
-                        "prompt": prompt,
-                        "stream": False,
-                        "options": {
-                            "num_predict": max_tokens,
-                            "temperature": 0.1
-                        }
-                    },
-                    timeout=60.0
+            chunks = [
+                chunk async for chunk in self._call_ollama_stream(
+                    prompt, model, max_tokens, temperature, schema, system
                 )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    return data.get("response", "")
-                else:
-                    raise LLMServiceError(f"Ollama API error: {response.status_code}")
+            ]
+            return "".join(chunks)
                     
         except Exception as e:
             logger.error(f"Ollama API error: {e}")
             raise LLMServiceError(f"Ollama call failed: {e}")
     
+    async def _call_ollama_stream(
+        self,
+        prompt: str,
+        model: str,
+        max_tokens: int,
+        temperature: float = DEFAULT_TEMPERATURE,
+        schema: Optional[Type[BaseModel]] = None,
+        system: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Stream an Ollama generation, yielding response fragments as NDJSON lines arrive"""
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": True,
+            "options": {
+                "num_predict": max_tokens,
+                "temperature": temperature
+            }
+        }
+        if schema is not None:
+            payload["format"] = schema.model_json_schema()
+        if system:
+            payload["system"] = system
+        
+        async with self.http_client.stream(
+            "POST",
+            f"{self.ollama_base_url}/api/generate",
+            json=payload,
+            timeout=60.0
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                response.raise_for_status()
+            
+            # aiter_lines reassembles objects split across network chunks
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                data = orjson.loads(line)
+                if data.get("error"):
+                    raise LLMServiceError(f"Ollama API error: {data['error']}")
+                fragment = data.get("response")
+                if fragment:
+                    yield fragment
+                if data.get("done"):
+                    break
+    
     async def analyze_task_complexity(
         self,
         task: Task,
@@ -525,36 +1188,13 @@ Make the plan as detailed and actionable as possible. Each step should be execut
     ) -> Dict[str, Any]:
         """Analyze task complexity and requirements"""
         try:
-            prompt = f"""
-Analyze the following task and provide insights about its complexity and requirements:
-
-Task Details:
-- Title: {task.title}
-- Description: {task.description}
-- Priority: {task.priority}
-- Parameters: {json.dumps(task.parameters or {}, indent=2)}
-
-Please analyze and respond with a JSON object containing:
-{{
-    "complexity": "low/medium/high",
-    "estimated_duration": "estimated time to complete",
-    "required_capabilities": ["list of capabilities needed"],
-    "potential_challenges": ["list of potential challenges"],
-    "recommended_approach": "suggested approach to tackle this task",
-    "resource_requirements": ["list of resources needed"]
-}}
-"""
-            
-            response = await self._call_llm(prompt, provider, model)
-            
-            try:
-                analysis = json.loads(response)
-                return analysis
-            except json.JSONDecodeError:
-                return {
-                    "complexity": "unknown",
-                    "error": "Failed to parse analysis response"
-                }
+            response = await self._call_llm(
+                TASK_ANALYSIS_PROMPT, provider, model,
+                semantic_cache=True,
+                schema=ComplexityAnalysis,
+                system=self._task_system_prompt(task)
+            )
+            return self._parse_analysis(response)
                 
         except Exception as e:
             logger.error(f"Error analyzing task complexity: {e}")
@@ -563,6 +1203,25 @@ Please analyze and respond with a JSON object containing:
                 "error": str(e)
             }
     
+    def _task_system_prompt(self, task: Task) -> str:
+        """System message shared by every prompt stage of a task"""
+        return SYSTEM_PREAMBLE + TASK_CONTEXT_TMPL.substitute(
+            task_title=task.title,
+            task_description=task.description,
+            task_priority=task.priority,
+            task_parameters=_dumps_indented(task.input_data or {})
+        )
+    
+    def _parse_analysis(self, response: str) -> Dict[str, Any]:
+        """Parse a complexity analysis response"""
+        try:
+            return _parse_json_response(response)
+        except orjson.JSONDecodeError:
+            return {
+                "complexity": "unknown",
+                "error": "Failed to parse analysis response"
+            }
+    
     async def get_available_models(self, provider: LLMProvider) -> List[str]:
         """Get list of available models for a provider"""
         try:
@@ -583,13 +1242,19 @@ Please analyze and respond with a JSON object containing:
             elif provider == LLMProvider.ANTHROPIC:
                 return ["claude-3-5-sonnet-20241022", "claude-3-haiku-20240307"]
             elif provider == LLMProvider.OLLAMA:
+                # Serve repeated UI polls from memory instead of hitting /api/tags
+                cached = self._models_cache.get(self.ollama_base_url)
+                if cached and time.monotonic() - cached[0] < settings.LLM_MODELS_CACHE_TTL_SECONDS:
+                    return list(cached[1])
+                
                 # Try to get models from Ollama API
                 try:
-                    async with httpx.AsyncClient() as client:
-                        response = await client.get(f"{self.ollama_base_url}/api/tags")
-                        if response.status_code == 200:
-                            data = response.json()
-                            return [model["name"] for model in data.get("models", [])]
+                    response = await self.http_client.get(f"{self.ollama_base_url}/api/tags")
+                    if response.status_code == 200:
+                        data = response.json()
+                        models = [model["name"] for model in data.get("models", [])]
+                        self._models_cache[self.ollama_base_url] = (time.monotonic(), models)
+                        return list(models)
                 except:
                     pass
                 return ["llama2", "codellama", "mistral", "phi"]
@@ -0,0 +1,207 @@
+"""
+Metric Store
+Compact in-memory aggregation of monitoring samples
+"""
+
+import math
+import time
+from array import array
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with a relative-error guarantee (DDSketch)
+
+    Values are counted in logarithmically sized bins, so any quantile is
+    reported within relative_accuracy of the true value while memory grows
+    with the range of values rather than the number of samples. Values are
+    expected to be non-negative; zero and below share a single bin.
+    """
+
+    __slots__ = ("relative_accuracy", "_gamma", "_log_gamma", "bins", "zero_count", "count", "sum", "min", "max")
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        if value > 0:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[key] = self.bins.get(key, 0) + 1
+        else:
+            self.zero_count += 1
+
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "QuantileSketch"):
+        """Fold another sketch with the same relative accuracy into this one"""
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def avg(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return max(self.min, 0.0)
+
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                # Midpoint (in relative terms) of the bin (gamma^(key-1), gamma^key]
+                value = 2 * self._gamma ** key / (self._gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+
+class RollingSketch:
+    """
+    Quantile sketches bucketed by wall-clock time
+
+    Each bucket covers bucket_seconds; buckets older than the retention period
+    are dropped as new ones open. A summary over the last N hours merges the
+    buckets it overlaps, so its cost depends on the number of buckets and
+    bins, not on how many samples were recorded.
+    """
+
+    def __init__(
+        self,
+        retention_hours: int = 168,
+        bucket_seconds: int = 3600,
+        relative_accuracy: float = 0.01
+    ):
+        self.bucket_seconds = bucket_seconds
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max(1, retention_hours * 3600 // bucket_seconds)
+        self._buckets: Deque[Tuple[int, QuantileSketch]] = deque()
+
+    def add(self, value: float, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        index = int(now // self.bucket_seconds)
+
+        if not self._buckets or self._buckets[-1][0] != index:
+            self._buckets.append((index, QuantileSketch(self.relative_accuracy)))
+            oldest = index - self.max_buckets + 1
+            while self._buckets[0][0] < oldest:
+                self._buckets.popleft()
+
+        self._buckets[-1][1].add(value)
+
+    def window(self, seconds: float, now: Optional[float] = None) -> QuantileSketch:
+        """Merged sketch of every bucket overlapping the last `seconds`"""
+        now = time.time() if now is None else now
+        first = int((now - seconds) // self.bucket_seconds)
+
+        merged = QuantileSketch(self.relative_accuracy)
+        for index, sketch in self._buckets:
+            if index >= first:
+                merged.merge(sketch)
+        return merged
+
+
+class MetricRing:
+    """
+    Fixed-capacity ring of samples stored column-wise in typed arrays
+
+    Each column is a preallocated array.array, so recording a sample writes a
+    few machine values in place instead of allocating an object per sample,
+    and the garbage collector has nothing to traverse. Once full, the oldest
+    sample is overwritten.
+    """
+
+    def __init__(self, capacity: int, columns: Dict[str, str]):
+        """
+        Args:
+            capacity: Number of samples kept
+            columns: Column name to array typecode, e.g. {"cpu_percent": "f"}
+        """
+        self.capacity = capacity
+        self._columns = {
+            name: array(typecode, [0]) * capacity
+            for name, typecode in columns.items()
+        }
+        self._head = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, **values: float):
+        index = self._head
+        for name, column in self._columns.items():
+            column[index] = values[name]
+        self._head = (index + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def column(self, name: str) -> List[float]:
+        """Values of one column, oldest first"""
+        column = self._columns[name]
+        if self._count < self.capacity:
+            return column[:self._count].tolist()
+        return column[self._head:].tolist() + column[:self._head].tolist()
+
+
+class BoundedServerMap(OrderedDict):
+    """
+    Per-server mapping that forgets the least recently used server past maxsize
+
+    Keeps per-server statistics from growing without bound as servers are
+    added and removed over the life of the process. Item access and
+    assignment mark a server as recently used; get() and iteration don't.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 4096,
+        default_factory: Optional[Callable[[], Any]] = None,
+        on_evict: Optional[Callable[[Any], None]] = None
+    ):
+        super().__init__()
+        self.maxsize = maxsize
+        self.default_factory = default_factory
+        self.on_evict = on_evict
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def __missing__(self, key):
+        if self.default_factory is None:
+            raise KeyError(key)
+        value = self[key] = self.default_factory()
+        return value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > self.maxsize:
+            evicted, _ = self.popitem(last=False)
+            if self.on_evict is not None:
+                self.on_evict(evicted)
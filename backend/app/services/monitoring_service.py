@@ -6,18 +6,23 @@ Comprehensive monitoring and logging system for Hisper
 import asyncio
 import json
 import logging
+import math
+import sys
 import time
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Any, Optional, Tuple
+from dataclasses import dataclass
 from collections import defaultdict, deque
 import structlog
 from prometheus_client import Counter, Histogram, Gauge, CollectorRegistry, generate_latest
+from prometheus_client.core import GaugeMetricFamily
 import psutil
 
+from ..core.config import settings
 from ..models.mcp_server import MCPServer
 from ..models.task import Task
 from .mcp_client import mcp_client
+from .metric_store import BoundedServerMap, MetricRing, QuantileSketch, RollingSketch
 
 # Configure structured logging
 structlog.configure(
@@ -34,17 +39,25 @@ structlog.configure(
     ],
     context_class=dict,
     logger_factory=structlog.stdlib.LoggerFactory(),
-    wrapper_class=structlog.stdlib.BoundLogger,
+    # Calls below LOG_LEVEL return immediately, before any processor runs
+    wrapper_class=structlog.make_filtering_bound_logger(
+        logging.getLevelName(settings.LOG_LEVEL.upper())
+    ),
     cache_logger_on_first_use=True,
 )
 
 logger = structlog.get_logger(__name__)
 
 
-@dataclass
+def _isoformat_ns(timestamp_ns: int) -> str:
+    """Render an epoch timestamp in nanoseconds as ISO 8601 UTC"""
+    return datetime.fromtimestamp(timestamp_ns / 1e9, tz=timezone.utc).isoformat()
+
+
+@dataclass(slots=True)
 class SystemMetrics:
     """System performance metrics"""
-    timestamp: datetime
+    timestamp_ns: int
     cpu_percent: float
     memory_percent: float
     memory_used_mb: float
@@ -54,14 +67,29 @@ class SystemMetrics:
     active_tasks: int
     healthy_servers: int
     total_servers: int
+    
+    def as_dict(self) -> Dict[str, Any]:
+        # Flat fields only, so this skips dataclasses.asdict's recursive copy
+        return {
+            "timestamp": _isoformat_ns(self.timestamp_ns),
+            "cpu_percent": self.cpu_percent,
+            "memory_percent": self.memory_percent,
+            "memory_used_mb": self.memory_used_mb,
+            "memory_available_mb": self.memory_available_mb,
+            "disk_usage_percent": self.disk_usage_percent,
+            "active_connections": self.active_connections,
+            "active_tasks": self.active_tasks,
+            "healthy_servers": self.healthy_servers,
+            "total_servers": self.total_servers
+        }
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ServerMetrics:
     """MCP Server metrics"""
     server_id: int
     server_name: str
-    timestamp: datetime
+    timestamp_ns: int
     status: str
     response_time_ms: Optional[float]
     success_rate: float
@@ -70,16 +98,74 @@ class ServerMetrics:
     last_error: Optional[str]
 
 
-@dataclass
-class TaskMetrics:
-    """Task execution metrics"""
-    task_id: int
-    timestamp: datetime
-    status: str
-    duration_ms: Optional[float]
-    server_id: Optional[int]
-    success: bool
-    error_message: Optional[str]
+class CpuSampler:
+    """
+    Non-blocking CPU utilisation over the interval since the previous sample
+    
+    Same calculation as psutil.cpu_percent(interval=None), but with its own
+    baseline, so independent readers don't reset each other's interval.
+    """
+    
+    def __init__(self):
+        self._last = psutil.cpu_times()
+    
+    @staticmethod
+    def _busy_and_total(times) -> Tuple[float, float]:
+        # guest time is already included in user time on Linux
+        total = sum(times) - getattr(times, "guest", 0.0) - getattr(times, "guest_nice", 0.0)
+        idle = times.idle + getattr(times, "iowait", 0.0)
+        return total - idle, total
+    
+    def sample(self) -> float:
+        current = psutil.cpu_times()
+        busy_before, total_before = self._busy_and_total(self._last)
+        busy_now, total_now = self._busy_and_total(current)
+        self._last = current
+        
+        elapsed = total_now - total_before
+        if elapsed <= 0:
+            return 0.0
+        return min(100.0, max(0.0, (busy_now - busy_before) / elapsed * 100))
+
+
+class SystemMetricsCollector:
+    """
+    Prometheus collector that reads system gauges when the registry is scraped
+    
+    Values are current at scrape time instead of up to one monitoring interval
+    old, and nothing is sampled for Prometheus when nobody scrapes.
+    """
+    
+    def __init__(self, service: "MonitoringService"):
+        self.service = service
+        self._cpu = CpuSampler()
+    
+    def collect(self):
+        memory = psutil.virtual_memory()
+        latest = self.service.latest_system_metrics
+        # statvfs can block on slow filesystems, so reuse the service's reading,
+        # which is refreshed off the event loop every DISK_USAGE_TTL
+        disk_usage = self.service._disk_usage
+        
+        yield GaugeMetricFamily(
+            'hisper_cpu_usage_percent', 'CPU usage percentage', value=self._cpu.sample()
+        )
+        yield GaugeMetricFamily(
+            'hisper_memory_usage_percent', 'Memory usage percentage', value=memory.percent
+        )
+        yield GaugeMetricFamily(
+            'hisper_disk_usage_percent', 'Disk usage percentage',
+            value=disk_usage[1] if disk_usage else 0
+        )
+        yield GaugeMetricFamily(
+            'hisper_active_servers', 'Number of active servers',
+            value=len(mcp_client.active_connections)
+        )
+        # Health needs a round-trip per server, so this comes from the last check
+        yield GaugeMetricFamily(
+            'hisper_healthy_servers', 'Number of healthy servers',
+            value=latest.healthy_servers if latest else 0
+        )
 
 
 class MonitoringService:
@@ -87,24 +173,81 @@ class MonitoringService:
     Comprehensive monitoring service for system health, performance, and metrics
     """
     
+    COLLECTION_INTERVAL = 30.0  # seconds
+    DISK_USAGE_TTL = 60.0  # seconds
+    RESPONSE_TIME_SAMPLES = 128
+    MAX_CONCURRENT_HEALTH_CHECKS = 32
+    PROMETHEUS_FLUSH_EVENTS = 1024
+    MAX_TRACKED_SERVERS = 4096
+    ALERT_VALUE_EPSILON = 1.0  # percentage points / milliseconds
+    PROMETHEUS_RENDER_TTL = 5.0  # seconds
+    SCRAPE_ACTIVE_WINDOW_NS = 120 * 1_000_000_000
+    
     def __init__(self):
         # Prometheus metrics
         self.registry = CollectorRegistry()
         self._setup_prometheus_metrics()
         
-        # In-memory metrics storage
-        self.system_metrics: deque = deque(maxlen=1000)
-        self.server_metrics: Dict[int, deque] = defaultdict(lambda: deque(maxlen=100))
-        self.task_metrics: deque = deque(maxlen=1000)
+        # In-memory metrics storage. System and task history are kept column-wise
+        # in typed ring buffers; the full latest system sample is kept as-is
+        self.latest_system_metrics: Optional[SystemMetrics] = None
+        self.system_metrics = MetricRing(1000, {
+            "timestamp_ns": "q",
+            "cpu_percent": "f",
+            "memory_percent": "f",
+            "disk_usage_percent": "f"
+        })
+        self.server_metrics = BoundedServerMap(
+            self.MAX_TRACKED_SERVERS, lambda: deque(maxlen=100), self._on_evict("server_metrics")
+        )
+        self.task_metrics = MetricRing(1000, {
+            "timestamp_ns": "q",
+            "task_id": "q",
+            "duration_ms": "d",  # NaN when unknown
+            "success": "B"
+        })
         
-        # Counters and statistics
-        self.request_counts = defaultdict(int)
-        self.error_counts = defaultdict(int)
-        self.response_times = defaultdict(list)
+        # Hourly quantile sketches behind get_metrics_summary, covering the full
+        # 168h the API allows rather than only the samples still in the deques.
+        # Task outcomes are recorded as 1.0/0.0, so count is the task total and
+        # sum the number of successes.
+        self.cpu_sketch = RollingSketch()
+        self.memory_sketch = RollingSketch()
+        self.task_outcome_sketch = RollingSketch()
+        self.task_duration_sketch = RollingSketch()
+        
+        # Prometheus counter/histogram updates, keyed by (metric, label values).
+        # They are applied in one pass when metrics are rendered (or every
+        # PROMETHEUS_FLUSH_EVENTS events) instead of a label lookup per event
+        self._pending_counts: Dict[Tuple[Any, Tuple[str, ...]], int] = defaultdict(int)
+        self._pending_observations: Dict[Tuple[Any, Tuple[str, ...]], List[float]] = defaultdict(list)
+        self._pending_events = 0
+        self._metric_children: Dict[Tuple[Any, Tuple[str, ...]], Any] = {}
+        self._rendered: Optional[Tuple[float, bytes, str]] = None  # (monotonic time, body, etag)
+        self._rendered_version = 0
+        self._last_scrape_ns: Optional[int] = None
+        self._server_key_cache = BoundedServerMap(
+            self.MAX_TRACKED_SERVERS, on_evict=self._on_evict("label_keys")
+        )
+        
+        # Counters and statistics; per-server maps keep the MAX_TRACKED_SERVERS
+        # most recently seen servers
+        self.request_counts = BoundedServerMap(
+            self.MAX_TRACKED_SERVERS, int, self._on_evict("request_counts")
+        )
+        self.error_counts = BoundedServerMap(
+            self.MAX_TRACKED_SERVERS, int, self._on_evict("error_counts")
+        )
+        # Last RESPONSE_TIME_SAMPLES response times per server
+        self.response_times = BoundedServerMap(
+            self.MAX_TRACKED_SERVERS, on_evict=self._on_evict("response_times")
+        )
         
         # Monitoring state
         self.monitoring_active = False
         self.monitoring_task = None
+        self._cpu_sampler = CpuSampler()
+        self._disk_usage: Optional[Tuple[float, float]] = None  # (monotonic time, percent)
         
         # Alerts
         self.alert_thresholds = {
@@ -115,28 +258,16 @@ class MonitoringService:
             "server_error_rate": 0.1  # 10%
         }
         
-        self.active_alerts = []
+        # Replaced wholesale on each check, never mutated, so it can be handed out as-is
+        self.active_alerts: Tuple[Dict[str, Any], ...] = ()
+        self._active_alert_keys: set = set()
+        # Last value and alert dict per (type, server_id), for reuse across checks
+        self._alert_cache: Dict[Tuple[str, Optional[int]], Tuple[float, Dict[str, Any]]] = {}
     
     def _setup_prometheus_metrics(self):
         """Setup Prometheus metrics"""
-        # System metrics
-        self.cpu_usage = Gauge(
-            'hisper_cpu_usage_percent',
-            'CPU usage percentage',
-            registry=self.registry
-        )
-        
-        self.memory_usage = Gauge(
-            'hisper_memory_usage_percent',
-            'Memory usage percentage',
-            registry=self.registry
-        )
-        
-        self.disk_usage = Gauge(
-            'hisper_disk_usage_percent',
-            'Disk usage percentage',
-            registry=self.registry
-        )
+        # System and server-count gauges are read when scraped
+        self.registry.register(SystemMetricsCollector(self))
         
         # Server metrics
         self.server_requests_total = Counter(
@@ -153,18 +284,6 @@ class MonitoringService:
             registry=self.registry
         )
         
-        self.active_servers = Gauge(
-            'hisper_active_servers',
-            'Number of active servers',
-            registry=self.registry
-        )
-        
-        self.healthy_servers = Gauge(
-            'hisper_healthy_servers',
-            'Number of healthy servers',
-            registry=self.registry
-        )
-        
         # Task metrics
         self.task_executions_total = Counter(
             'hisper_task_executions_total',
@@ -185,6 +304,24 @@ class MonitoringService:
             'Number of active tasks',
             registry=self.registry
         )
+        
+        self.server_evictions_total = Counter(
+            'hisper_server_eviction_total',
+            'Servers dropped from in-memory per-server statistics',
+            ['store'],
+            registry=self.registry
+        )
+        
+        # LLM metrics
+        self.llm_responses_repaired_total = Counter(
+            'hisper_llm_responses_repaired_total',
+            'LLM responses whose JSON had to be repaired before parsing',
+            registry=self.registry
+        )
+    
+    def _on_evict(self, store: str) -> Callable[[Any], None]:
+        counter = self.server_evictions_total.labels(store=store)
+        return lambda _: counter.inc()
     
     async def start_monitoring(self):
         """Start the monitoring service"""
@@ -213,6 +350,9 @@ class MonitoringService:
     
     async def _monitoring_loop(self):
         """Main monitoring loop"""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        
         try:
             while self.monitoring_active:
                 # Collect system metrics
@@ -224,11 +364,15 @@ class MonitoringService:
                 # Check for alerts
                 await self._check_alerts()
                 
-                # Update Prometheus metrics
-                self._update_prometheus_metrics()
-                
-                # Wait before next collection
-                await asyncio.sleep(30)  # Collect every 30 seconds
+                # Sleep until the next absolute deadline so time spent collecting
+                # doesn't stretch the interval; after an overrun, restart from now
+                # instead of running back-to-back cycles to catch up
+                next_tick += self.COLLECTION_INTERVAL
+                delay = next_tick - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    next_tick = loop.time()
                 
         except asyncio.CancelledError:
             logger.info("Monitoring loop cancelled")
@@ -238,8 +382,8 @@ class MonitoringService:
     async def _collect_system_metrics(self):
         """Collect system performance metrics"""
         try:
-            # CPU usage
-            cpu_percent = psutil.cpu_percent(interval=1)
+            # CPU usage since the previous tick; doesn't block the event loop
+            cpu_percent = self._cpu_sampler.sample()
             
             # Memory usage
             memory = psutil.virtual_memory()
@@ -247,16 +391,16 @@ class MonitoringService:
             memory_used_mb = memory.used / (1024 * 1024)
             memory_available_mb = memory.available / (1024 * 1024)
             
-            # Disk usage
-            disk = psutil.disk_usage('/')
-            disk_usage_percent = (disk.used / disk.total) * 100
+            # Disk usage barely moves between ticks, so statvfs is only re-run
+            # once the cached reading is older than DISK_USAGE_TTL
+            disk_usage_percent = await self._disk_usage_percent()
             
             # Application metrics
             active_connections = len(mcp_client.active_connections)
             
             # Create metrics object
             metrics = SystemMetrics(
-                timestamp=datetime.utcnow(),
+                timestamp_ns=time.time_ns(),
                 cpu_percent=cpu_percent,
                 memory_percent=memory_percent,
                 memory_used_mb=memory_used_mb,
@@ -268,7 +412,15 @@ class MonitoringService:
                 total_servers=0
             )
             
-            self.system_metrics.append(metrics)
+            self.latest_system_metrics = metrics
+            self.system_metrics.append(
+                timestamp_ns=metrics.timestamp_ns,
+                cpu_percent=cpu_percent,
+                memory_percent=memory_percent,
+                disk_usage_percent=disk_usage_percent
+            )
+            self.cpu_sketch.add(cpu_percent)
+            self.memory_sketch.add(memory_percent)
             
             logger.debug(
                 "System metrics collected",
@@ -281,124 +433,165 @@ class MonitoringService:
         except Exception as e:
             logger.error("Error collecting system metrics", error=str(e))
     
+    async def _disk_usage_percent(self) -> float:
+        now = time.monotonic()
+        if self._disk_usage is None or now - self._disk_usage[0] > self.DISK_USAGE_TTL:
+            # statvfs can stall on slow or network filesystems
+            disk = await asyncio.get_running_loop().run_in_executor(None, psutil.disk_usage, '/')
+            self._disk_usage = (now, (disk.used / disk.total) * 100)
+        return self._disk_usage[1]
+    
     async def _collect_server_metrics(self):
         """Collect MCP server metrics"""
         try:
+            server_ids = list(mcp_client.active_connections.keys())
+            
+            # Probe servers concurrently so a cycle takes about one health-check
+            # round-trip rather than one per server
+            semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_HEALTH_CHECKS)
+            results = await asyncio.gather(
+                *(self._probe_server(server_id, semaphore) for server_id in server_ids),
+                return_exceptions=True
+            )
+            
             healthy_count = 0
-            total_count = len(mcp_client.active_connections)
-            
-            for server_id in mcp_client.active_connections.keys():
-                try:
-                    # Perform health check
-                    start_time = time.time()
-                    health_result = await mcp_client.health_check(server_id)
-                    response_time_ms = (time.time() - start_time) * 1000
-                    
-                    is_healthy = health_result.get("healthy", False)
-                    if is_healthy:
-                        healthy_count += 1
-                    
-                    # Get server info (this would come from database in real implementation)
-                    server_name = f"server_{server_id}"
-                    
-                    # Calculate success rate (simplified)
-                    total_requests = self.request_counts.get(server_id, 0)
-                    failed_requests = self.error_counts.get(server_id, 0)
-                    success_rate = (total_requests - failed_requests) / max(total_requests, 1)
-                    
-                    metrics = ServerMetrics(
-                        server_id=server_id,
-                        server_name=server_name,
-                        timestamp=datetime.utcnow(),
-                        status="healthy" if is_healthy else "unhealthy",
-                        response_time_ms=response_time_ms,
-                        success_rate=success_rate,
-                        total_requests=total_requests,
-                        failed_requests=failed_requests,
-                        last_error=health_result.get("error")
-                    )
-                    
-                    self.server_metrics[server_id].append(metrics)
-                    
-                except Exception as e:
-                    logger.error(f"Error collecting metrics for server {server_id}", error=str(e))
+            for server_id, result in zip(server_ids, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Error collecting metrics for server {server_id}", error=str(result))
+                elif result:
+                    healthy_count += 1
             
             # Update system metrics with server counts
-            if self.system_metrics:
-                latest_metrics = self.system_metrics[-1]
+            if self.latest_system_metrics:
+                latest_metrics = self.latest_system_metrics
                 latest_metrics.healthy_servers = healthy_count
-                latest_metrics.total_servers = total_count
+                latest_metrics.total_servers = len(server_ids)
             
         except Exception as e:
             logger.error("Error collecting server metrics", error=str(e))
     
+    async def _probe_server(self, server_id: int, semaphore: asyncio.Semaphore) -> bool:
+        """Health-check one server, record its metrics and return whether it is healthy"""
+        async with semaphore:
+            start_ns = time.perf_counter_ns()
+            health_result = await mcp_client.health_check(server_id)
+            response_time_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
+        
+        is_healthy = health_result.get("healthy", False)
+        
+        # Get server info (this would come from database in real implementation)
+        server_name = f"server_{server_id}"
+        
+        # Calculate success rate (simplified)
+        total_requests = self.request_counts.get(server_id, 0)
+        failed_requests = self.error_counts.get(server_id, 0)
+        success_rate = (total_requests - failed_requests) / max(total_requests, 1)
+        
+        metrics = ServerMetrics(
+            server_id=server_id,
+            server_name=server_name,
+            timestamp_ns=time.time_ns(),
+            status="healthy" if is_healthy else "unhealthy",
+            response_time_ms=response_time_ms,
+            success_rate=success_rate,
+            total_requests=total_requests,
+            failed_requests=failed_requests,
+            last_error=health_result.get("error")
+        )
+        
+        self.server_metrics[server_id].append(metrics)
+        return is_healthy
+    
+    def _alert(
+        self,
+        alert_type: str,
+        severity: str,
+        value: float,
+        message_format: str,
+        message_args: Tuple[Any, ...],
+        server_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Alert dict for a crossed threshold, reused while its value holds steady
+        
+        A sustained alert is only rebuilt (and its message reformatted) once the
+        value moves by more than ALERT_VALUE_EPSILON, so its timestamp marks when
+        the current reading was first reported.
+        """
+        key = (alert_type, server_id)
+        cached = self._alert_cache.get(key)
+        if cached is not None and abs(cached[0] - value) <= self.ALERT_VALUE_EPSILON:
+            return cached[1]
+        
+        alert = {
+            "type": alert_type,
+            "message": message_format % message_args,
+            "severity": severity,
+            "timestamp": datetime.utcnow()
+        }
+        if server_id is not None:
+            alert["server_id"] = server_id
+        self._alert_cache[key] = (value, alert)
+        return alert
+    
     async def _check_alerts(self):
         """Check for alert conditions"""
         try:
             current_alerts = []
             
-            if self.system_metrics:
-                latest_metrics = self.system_metrics[-1]
+            if self.latest_system_metrics:
+                latest_metrics = self.latest_system_metrics
                 
                 # CPU alert
                 if latest_metrics.cpu_percent > self.alert_thresholds["cpu_percent"]:
-                    current_alerts.append({
-                        "type": "cpu_high",
-                        "message": f"High CPU usage: {latest_metrics.cpu_percent:.1f}%",
-                        "severity": "warning",
-                        "timestamp": datetime.utcnow()
-                    })
+                    current_alerts.append(self._alert(
+                        "cpu_high", "warning", latest_metrics.cpu_percent,
+                        "High CPU usage: %.1f%%", (latest_metrics.cpu_percent,)
+                    ))
                 
                 # Memory alert
                 if latest_metrics.memory_percent > self.alert_thresholds["memory_percent"]:
-                    current_alerts.append({
-                        "type": "memory_high",
-                        "message": f"High memory usage: {latest_metrics.memory_percent:.1f}%",
-                        "severity": "warning",
-                        "timestamp": datetime.utcnow()
-                    })
+                    current_alerts.append(self._alert(
+                        "memory_high", "warning", latest_metrics.memory_percent,
+                        "High memory usage: %.1f%%", (latest_metrics.memory_percent,)
+                    ))
                 
                 # Disk alert
                 if latest_metrics.disk_usage_percent > self.alert_thresholds["disk_usage_percent"]:
-                    current_alerts.append({
-                        "type": "disk_high",
-                        "message": f"High disk usage: {latest_metrics.disk_usage_percent:.1f}%",
-                        "severity": "critical",
-                        "timestamp": datetime.utcnow()
-                    })
+                    current_alerts.append(self._alert(
+                        "disk_high", "critical", latest_metrics.disk_usage_percent,
+                        "High disk usage: %.1f%%", (latest_metrics.disk_usage_percent,)
+                    ))
             
             # Server alerts
             for server_id, metrics_list in self.server_metrics.items():
                 if metrics_list:
                     latest_server_metrics = metrics_list[-1]
+                    server_name = latest_server_metrics.server_name
                     
                     # Response time alert
-                    if (latest_server_metrics.response_time_ms and 
-                        latest_server_metrics.response_time_ms > self.alert_thresholds["server_response_time_ms"]):
-                        current_alerts.append({
-                            "type": "server_slow",
-                            "message": f"Slow server response: {latest_server_metrics.server_name} ({latest_server_metrics.response_time_ms:.0f}ms)",
-                            "severity": "warning",
-                            "timestamp": datetime.utcnow(),
-                            "server_id": server_id
-                        })
+                    response_time_ms = latest_server_metrics.response_time_ms
+                    if response_time_ms and response_time_ms > self.alert_thresholds["server_response_time_ms"]:
+                        current_alerts.append(self._alert(
+                            "server_slow", "warning", response_time_ms,
+                            "Slow server response: %s (%.0fms)", (server_name, response_time_ms),
+                            server_id=server_id
+                        ))
                     
                     # Error rate alert
                     if latest_server_metrics.success_rate < (1 - self.alert_thresholds["server_error_rate"]):
-                        current_alerts.append({
-                            "type": "server_errors",
-                            "message": f"High error rate: {latest_server_metrics.server_name} ({(1-latest_server_metrics.success_rate)*100:.1f}%)",
-                            "severity": "critical",
-                            "timestamp": datetime.utcnow(),
-                            "server_id": server_id
-                        })
-            
-            # Update active alerts
-            self.active_alerts = current_alerts
-            
-            # Log new alerts
+                        error_percent = (1 - latest_server_metrics.success_rate) * 100
+                        current_alerts.append(self._alert(
+                            "server_errors", "critical", error_percent,
+                            "High error rate: %s (%.1f%%)", (server_name, error_percent),
+                            server_id=server_id
+                        ))
+            
+            # Log alerts that weren't active on the previous check; an alert is
+            # identified by its type and server, not its message or timestamp
+            current_keys = {(alert["type"], alert.get("server_id")) for alert in current_alerts}
             for alert in current_alerts:
-                if alert not in self.active_alerts:
+                if (alert["type"], alert.get("server_id")) not in self._active_alert_keys:
                     logger.warning(
                         "New alert triggered",
                         alert_type=alert["type"],
@@ -406,22 +599,14 @@ class MonitoringService:
                         severity=alert["severity"]
                     )
             
-        except Exception as e:
-            logger.error("Error checking alerts", error=str(e))
-    
-    def _update_prometheus_metrics(self):
-        """Update Prometheus metrics with latest data"""
-        try:
-            if self.system_metrics:
-                latest = self.system_metrics[-1]
-                self.cpu_usage.set(latest.cpu_percent)
-                self.memory_usage.set(latest.memory_percent)
-                self.disk_usage.set(latest.disk_usage_percent)
-                self.active_servers.set(latest.total_servers)
-                self.healthy_servers.set(latest.healthy_servers)
+            # Update active alerts
+            self.active_alerts = tuple(current_alerts)
+            self._active_alert_keys = current_keys
+            for key in self._alert_cache.keys() - current_keys:
+                del self._alert_cache[key]
             
         except Exception as e:
-            logger.error("Error updating Prometheus metrics", error=str(e))
+            logger.error("Error checking alerts", error=str(e))
     
     def record_server_request(self, server_id: int, server_name: str, success: bool, response_time_ms: float):
         """Record a server request for metrics"""
@@ -432,22 +617,19 @@ class MonitoringService:
                 self.error_counts[server_id] += 1
             
             # Update response times
-            if server_id not in self.response_times:
-                self.response_times[server_id] = deque(maxlen=100)
-            self.response_times[server_id].append(response_time_ms)
-            
-            # Update Prometheus metrics
-            status = "success" if success else "error"
-            self.server_requests_total.labels(
-                server_id=str(server_id),
-                server_name=server_name,
-                status=status
-            ).inc()
-            
-            self.server_response_time.labels(
-                server_id=str(server_id),
-                server_name=server_name
-            ).observe(response_time_ms / 1000.0)
+            ring = self.response_times.get(server_id)
+            if ring is None:
+                ring = self.response_times[server_id] = MetricRing(
+                    self.RESPONSE_TIME_SAMPLES, {"response_time_ms": "f"}
+                )
+            ring.append(response_time_ms=response_time_ms)
+            
+            # Queue Prometheus updates
+            count_key, time_key = self._server_metric_keys(server_id, server_name, success)
+            self._pending_counts[count_key] += 1
+            if self._scraper_attached():
+                self._pending_observations[time_key].append(response_time_ms / 1000.0)
+            self._note_pending_event()
             
             logger.debug(
                 "Server request recorded",
@@ -460,32 +642,47 @@ class MonitoringService:
         except Exception as e:
             logger.error("Error recording server request", error=str(e))
     
+    def _server_metric_keys(
+        self, server_id: int, server_name: str, success: bool
+    ) -> Tuple[Tuple[Any, Tuple[str, ...]], Tuple[Any, Tuple[str, ...]]]:
+        """
+        Pending-update keys for a server's request counter and response histogram
+        
+        Built once per (server, outcome), so recording a request doesn't format
+        the server id or allocate label tuples.
+        """
+        cache_key = (server_id, server_name, success)
+        keys = self._server_key_cache.get(cache_key)
+        if keys is None:
+            sid = sys.intern(str(server_id))
+            name = sys.intern(server_name)
+            status = "success" if success else "error"
+            keys = self._server_key_cache[cache_key] = (
+                (self.server_requests_total, (sid, name, status)),
+                (self.server_response_time, (sid, name))
+            )
+        return keys
+    
     def record_task_execution(self, task_id: int, status: str, priority: str, duration_ms: Optional[float], success: bool, error_message: Optional[str] = None):
         """Record a task execution for metrics"""
         try:
-            metrics = TaskMetrics(
+            self.task_metrics.append(
+                timestamp_ns=time.time_ns(),
                 task_id=task_id,
-                timestamp=datetime.utcnow(),
-                status=status,
-                duration_ms=duration_ms,
-                server_id=None,
-                success=success,
-                error_message=error_message
+                duration_ms=duration_ms if duration_ms is not None else math.nan,
+                success=success
             )
-            
-            self.task_metrics.append(metrics)
-            
-            # Update Prometheus metrics
-            self.task_executions_total.labels(
-                status=status,
-                priority=priority
-            ).inc()
-            
+            self.task_outcome_sketch.add(1.0 if success else 0.0)
             if duration_ms:
-                self.task_duration.labels(
-                    status=status,
-                    priority=priority
-                ).observe(duration_ms / 1000.0)
+                self.task_duration_sketch.add(duration_ms)
+            
+            # Queue Prometheus updates
+            self._pending_counts[(self.task_executions_total, (status, priority))] += 1
+            if duration_ms and self._scraper_attached():
+                self._pending_observations[
+                    (self.task_duration, (status, priority))
+                ].append(duration_ms / 1000.0)
+            self._note_pending_event()
             
             logger.debug(
                 "Task execution recorded",
@@ -498,14 +695,20 @@ class MonitoringService:
         except Exception as e:
             logger.error("Error recording task execution", error=str(e))
     
+    def record_llm_response_repaired(self):
+        """Record an LLM response that needed JSON repair"""
+        try:
+            self.llm_responses_repaired_total.inc()
+        except Exception as e:
+            logger.error("Error recording repaired LLM response", error=str(e))
+    
     def get_system_health(self) -> Dict[str, Any]:
         """Get current system health status"""
         try:
-            if not self.system_metrics:
+            latest = self.latest_system_metrics
+            if latest is None:
                 return {"status": "unknown", "message": "No metrics available"}
             
-            latest = self.system_metrics[-1]
-            
             # Determine overall health
             health_issues = []
             
@@ -528,8 +731,8 @@ class MonitoringService:
             return {
                 "status": status,
                 "message": message,
-                "timestamp": latest.timestamp.isoformat(),
-                "metrics": asdict(latest),
+                "timestamp": _isoformat_ns(latest.timestamp_ns),
+                "metrics": latest.as_dict(),
                 "active_alerts": len(self.active_alerts)
             }
             
@@ -554,7 +757,7 @@ class MonitoringService:
                     "total_requests": latest.total_requests,
                     "failed_requests": latest.failed_requests,
                     "last_error": latest.last_error,
-                    "timestamp": latest.timestamp.isoformat()
+                    "timestamp": _isoformat_ns(latest.timestamp_ns)
                 }
             else:
                 # Get all servers health summary
@@ -584,52 +787,50 @@ class MonitoringService:
             logger.error("Error getting server health", error=str(e))
             return {"status": "error", "message": str(e)}
     
+    @staticmethod
+    def _describe_sketch(sketch: QuantileSketch) -> Dict[str, Optional[float]]:
+        return {
+            "avg": sketch.avg,
+            "max": sketch.max,
+            "min": sketch.min,
+            "p50": sketch.quantile(0.5),
+            "p95": sketch.quantile(0.95),
+            "p99": sketch.quantile(0.99)
+        }
+    
     def get_metrics_summary(self, hours: int = 24) -> Dict[str, Any]:
         """Get metrics summary for the specified time period"""
         try:
-            cutoff_time = datetime.utcnow() - timedelta(hours=hours)
+            window_seconds = hours * 3600
             
             # System metrics summary
-            recent_system_metrics = [
-                m for m in self.system_metrics 
-                if m.timestamp > cutoff_time
-            ]
+            cpu = self.cpu_sketch.window(window_seconds)
+            memory = self.memory_sketch.window(window_seconds)
             
             system_summary = {}
-            if recent_system_metrics:
-                cpu_values = [m.cpu_percent for m in recent_system_metrics]
-                memory_values = [m.memory_percent for m in recent_system_metrics]
-                
+            if cpu.count:
                 system_summary = {
-                    "cpu": {
-                        "avg": sum(cpu_values) / len(cpu_values),
-                        "max": max(cpu_values),
-                        "min": min(cpu_values)
-                    },
-                    "memory": {
-                        "avg": sum(memory_values) / len(memory_values),
-                        "max": max(memory_values),
-                        "min": min(memory_values)
-                    }
+                    "cpu": self._describe_sketch(cpu),
+                    "memory": self._describe_sketch(memory)
                 }
             
             # Task metrics summary
-            recent_task_metrics = [
-                m for m in self.task_metrics 
-                if m.timestamp > cutoff_time
-            ]
+            outcomes = self.task_outcome_sketch.window(window_seconds)
+            successful_tasks = round(outcomes.sum)
             
             task_summary = {
-                "total_tasks": len(recent_task_metrics),
-                "successful_tasks": sum(1 for m in recent_task_metrics if m.success),
-                "failed_tasks": sum(1 for m in recent_task_metrics if not m.success)
+                "total_tasks": outcomes.count,
+                "successful_tasks": successful_tasks,
+                "failed_tasks": outcomes.count - successful_tasks
             }
             
-            if recent_task_metrics:
-                durations = [m.duration_ms for m in recent_task_metrics if m.duration_ms]
-                if durations:
-                    task_summary["avg_duration_ms"] = sum(durations) / len(durations)
-                    task_summary["max_duration_ms"] = max(durations)
+            durations = self.task_duration_sketch.window(window_seconds)
+            if durations.count:
+                task_summary["avg_duration_ms"] = durations.avg
+                task_summary["max_duration_ms"] = durations.max
+                task_summary["p50_duration_ms"] = durations.quantile(0.5)
+                task_summary["p95_duration_ms"] = durations.quantile(0.95)
+                task_summary["p99_duration_ms"] = durations.quantile(0.99)
             
             return {
                 "period_hours": hours,
@@ -643,17 +844,69 @@ class MonitoringService:
             logger.error("Error getting metrics summary", error=str(e))
             return {"error": str(e)}
     
-    def get_prometheus_metrics(self) -> str:
-        """Get Prometheus metrics in text format"""
+    def _scraper_attached(self) -> bool:
+        """
+        Whether Prometheus metrics were rendered within SCRAPE_ACTIVE_WINDOW
+        
+        Histogram observations are only queued while something scrapes; counters,
+        the in-memory statistics and the summary sketches are always updated.
+        """
+        return (
+            self._last_scrape_ns is not None
+            and time.monotonic_ns() - self._last_scrape_ns < self.SCRAPE_ACTIVE_WINDOW_NS
+        )
+    
+    def _note_pending_event(self):
+        self._pending_events += 1
+        if self._pending_events >= self.PROMETHEUS_FLUSH_EVENTS:
+            self._flush_prometheus()
+    
+    def _flush_prometheus(self):
+        """Apply queued counter increments and histogram observations"""
+        counts, self._pending_counts = self._pending_counts, defaultdict(int)
+        observations, self._pending_observations = self._pending_observations, defaultdict(list)
+        self._pending_events = 0
+        
+        for key, amount in counts.items():
+            self._metric_child(key).inc(amount)
+        
+        for key, values in observations.items():
+            child = self._metric_child(key)
+            for value in values:
+                child.observe(value)
+    
+    def _metric_child(self, key: Tuple[Any, Tuple[str, ...]]) -> Any:
+        """Labelled child of a metric, resolved once per label set"""
+        child = self._metric_children.get(key)
+        if child is None:
+            metric, labels = key
+            child = self._metric_children[key] = metric.labels(*labels)
+        return child
+    
+    def get_prometheus_metrics(self) -> Tuple[bytes, str]:
+        """
+        Get Prometheus metrics in text format, with an ETag for the rendering
+        
+        The encoded registry is reused for PROMETHEUS_RENDER_TTL seconds, so
+        several scrapers (or a dashboard polling alongside Prometheus) share one
+        rendering; the ETag changes whenever the output is re-rendered.
+        """
         try:
-            return generate_latest(self.registry).decode('utf-8')
+            self._last_scrape_ns = time.monotonic_ns()
+            now = time.monotonic()
+            if self._rendered is None or now - self._rendered[0] > self.PROMETHEUS_RENDER_TTL:
+                self._flush_prometheus()
+                body = generate_latest(self.registry)
+                self._rendered_version += 1
+                self._rendered = (now, body, f'"{self._rendered_version}"')
+            return self._rendered[1], self._rendered[2]
         except Exception as e:
             logger.error("Error generating Prometheus metrics", error=str(e))
-            return ""
+            return b"", ""
     
-    def get_alerts(self) -> List[Dict[str, Any]]:
+    def get_alerts(self) -> Tuple[Dict[str, Any], ...]:
         """Get current active alerts"""
-        return self.active_alerts.copy()
+        return self.active_alerts
     
     async def cleanup(self):
         """Cleanup monitoring service"""
@@ -7,13 +7,14 @@ import asyncio
 import logging
 import time
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import func, select, update
 
 from ..models.task import Task, TaskCreate, TaskUpdate, TaskStatus, TaskPriority
 from ..models.mcp_server import MCPServer
-from ..core.database import get_db
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal, get_db
 from .llm_service import llm_service, LLMProvider
 from .monitoring_service import monitoring_service
 
@@ -23,30 +24,43 @@ logger = logging.getLogger(__name__)
 class TaskService:
     """Service for managing and executing tasks with AI/LLM integration"""
     
+    # How long a task runs before its running status is written
+    RUNNING_STATUS_DELAY = 0.1
+    
+    # Rows fetched per round trip when streaming task listings
+    STREAM_BATCH_SIZE = 100
+    
+    # Queued executions remembered for cancellation; the oldest are forgotten
+    # first, since the worker finishes them without telling this process
+    MAX_QUEUED_TASKS = 10000
+    
     def __init__(self):
         self.active_tasks: Dict[int, asyncio.Task] = {}
+        # Celery task ids for executions handed to the worker queue
+        self.queued_tasks: Dict[int, str] = {}
+        # (fetched_at, providers) from get_available_llm_providers
+        self._providers_cache: Optional[Tuple[float, Dict[str, List[str]]]] = None
+        self._providers_inflight: Optional[asyncio.Task] = None
     
     async def create_task(self, db: AsyncSession, task_data: TaskCreate) -> Task:
         """Create a new task"""
+        # TaskCreate fields map onto columns one to one (input_data, user_id,
+        # ...); there is no server yet, the LLM routes the task later
         task = Task(
-            title=task_data.title,
-            description=task_data.description,
-            server_id=task_data.server_id,
-            priority=task_data.priority,
-            parameters=task_data.parameters,
+            **task_data.model_dump(),
             status=TaskStatus.PENDING,
             created_at=datetime.utcnow()
         )
         
+        # Sessions don't expire on commit and every column default is
+        # client-side, so the flushed object is already complete
         db.add(task)
         await db.commit()
-        await db.refresh(task)
         
         logger.info(f"Created task {task.id}: {task.title}")
         
         # Start task execution in background
-        execution_task = asyncio.create_task(self._execute_task_with_llm(task))
-        self.active_tasks[task.id] = execution_task
+        await self.start_execution(task)
         
         return task
     
@@ -55,6 +69,31 @@ class TaskService:
         result = await db.execute(select(Task).where(Task.id == task_id))
         return result.scalar_one_or_none()
     
+    def _tasks_query(
+        self,
+        skip: int,
+        limit: int,
+        status: Optional[TaskStatus],
+        priority: Optional[TaskPriority],
+        category: Optional[str] = None,
+        user_id: Optional[str] = None,
+        session_id: Optional[str] = None
+    ):
+        query = select(Task)
+        
+        if status:
+            query = query.where(Task.status == status)
+        if priority:
+            query = query.where(Task.priority == priority)
+        if category:
+            query = query.where(Task.category == category)
+        if user_id:
+            query = query.where(Task.user_id == user_id)
+        if session_id:
+            query = query.where(Task.session_id == session_id)
+        
+        return query.offset(skip).limit(limit).order_by(Task.created_at.desc())
+    
     async def get_tasks(
         self, 
         db: AsyncSession, 
@@ -64,18 +103,34 @@ class TaskService:
         priority: Optional[TaskPriority] = None
     ) -> List[Task]:
         """Get tasks with optional filtering"""
-        query = select(Task)
-        
-        if status:
-            query = query.where(Task.status == status)
-        if priority:
-            query = query.where(Task.priority == priority)
-        
-        query = query.offset(skip).limit(limit).order_by(Task.created_at.desc())
-        
-        result = await db.execute(query)
+        result = await db.execute(self._tasks_query(skip, limit, status, priority))
         return result.scalars().all()
     
+    async def stream_tasks(
+        self,
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        status: Optional[TaskStatus] = None,
+        priority: Optional[TaskPriority] = None,
+        category: Optional[str] = None,
+        user_id: Optional[str] = None,
+        session_id: Optional[str] = None
+    ) -> AsyncIterator[Task]:
+        """
+        Yield tasks with optional filtering, fetched STREAM_BATCH_SIZE rows at a time
+        
+        Uses a server-side cursor, so only one batch of rows is hydrated at a
+        time instead of the whole page; suited to large limits that are
+        written out as they arrive.
+        """
+        result = await db.stream_scalars(
+            self._tasks_query(skip, limit, status, priority, category, user_id, session_id)
+            .execution_options(yield_per=self.STREAM_BATCH_SIZE)
+        )
+        async for task in result:
+            yield task
+    
     async def update_task(self, db: AsyncSession, task_id: int, task_update: TaskUpdate) -> Optional[Task]:
         """Update a task"""
         task = await self.get_task(db, task_id)
@@ -89,6 +144,7 @@ class TaskService:
             await db.execute(
                 update(Task)
                 .where(Task.id == task_id)
+                .execution_options(synchronize_session=False)
                 .values(**update_data)
             )
             await db.commit()
@@ -104,8 +160,9 @@ class TaskService:
         
         # Cancel if running
         if task_id in self.active_tasks:
-            self.active_tasks[task_id].cancel()
-            del self.active_tasks[task_id]
+            self.active_tasks.pop(task_id).cancel()
+        # A queued execution finds the row gone and does nothing
+        self.queued_tasks.pop(task_id, None)
         
         await db.delete(task)
         await db.commit()
@@ -113,132 +170,180 @@ class TaskService:
         logger.info(f"Deleted task {task_id}")
         return True
     
-    async def _execute_task_with_llm(self, task: Task):
-        """Execute a task using LLM for intelligent routing and execution"""
-        start_time = time.time()
+    async def start_execution(self, task: Task):
+        """
+        Run a task in the background
         
-        try:
-            logger.info(f"Starting LLM-powered execution of task {task.id}")
-            
-            # Update status to running
-            async for db in get_db():
-                await db.execute(
-                    update(Task)
-                    .where(Task.id == task.id)
-                    .values(status=TaskStatus.RUNNING, started_at=datetime.utcnow())
-                )
-                await db.commit()
-                break
-            
-            # Get available MCP servers
-            available_servers = await self._get_available_servers()
+        With TASK_QUEUE_ENABLED the task is handed to a Celery worker so long
+        LLM pipelines don't occupy the API event loop; progress is tracked on
+        the task row as usual.
+        """
+        if settings.TASK_QUEUE_ENABLED:
+            from .task_worker import execute_task_with_llm
             
-            if not available_servers:
-                raise Exception("No MCP servers available for task execution")
-            
-            # Use LLM to analyze and execute the task
-            result = await llm_service.process_task_with_llm(
-                task=task,
-                available_servers=available_servers,
-                provider=LLMProvider.OPENROUTER,  # Default provider
-                model="deepseek/deepseek-chat"    # Default model
+            result = await asyncio.to_thread(execute_task_with_llm.delay, task.id)
+            self.queued_tasks.pop(task.id, None)
+            self.queued_tasks[task.id] = result.id
+            while len(self.queued_tasks) > self.MAX_QUEUED_TASKS:
+                del self.queued_tasks[next(iter(self.queued_tasks))]
+            logger.info(f"Queued task {task.id} for worker execution ({result.id})")
+        else:
+            execution_task = asyncio.create_task(self._execute_task_with_llm(task))
+            execution_task.add_done_callback(
+                lambda done, task_id=task.id: self._forget_execution(task_id, done)
             )
-            
-            # Update task with results
-            duration_ms = (time.time() - start_time) * 1000
-            
-            if result.get("success", False):
-                status = TaskStatus.COMPLETED
-                error_message = None
-            else:
-                status = TaskStatus.FAILED
-                error_message = result.get("error", "Unknown error")
-            
-            async for db in get_db():
+            self.active_tasks[task.id] = execution_task
+    
+    def _forget_execution(self, task_id: int, execution_task: asyncio.Task):
+        """Drop a finished execution, unless a retry has already replaced it"""
+        if self.active_tasks.get(task_id) is execution_task:
+            del self.active_tasks[task_id]
+    
+    async def _execute_task_with_llm(self, task: Task):
+        """
+        Execute a task using LLM for intelligent routing and execution
+        
+        The running status is only written once the task has been going for
+        RUNNING_STATUS_DELAY; tasks that finish sooner get a single UPDATE
+        recording both their start and their outcome.
+        """
+        start_ns = time.perf_counter_ns()
+        started_at = datetime.utcnow()
+        processing: Optional[asyncio.Future] = None
+        
+        # One session for every status transition of this run
+        async with AsyncSessionLocal() as db:
+            try:
+                logger.info(f"Starting LLM-powered execution of task {task.id}")
+                
+                # Get available MCP servers
+                available_servers = await self._get_available_servers(db)
+                
+                if not available_servers:
+                    raise Exception("No MCP servers available for task execution")
+                
+                # Use LLM to analyze and execute the task
+                processing = asyncio.ensure_future(llm_service.process_task_with_llm(
+                    task=task,
+                    available_servers=available_servers,
+                    provider=LLMProvider.OPENROUTER,  # Default provider
+                    model="deepseek/deepseek-chat"    # Default model
+                ))
+                
+                done, _ = await asyncio.wait({processing}, timeout=self.RUNNING_STATUS_DELAY)
+                if not done:
+                    # Long-running: surface the running state while it works
+                    await db.execute(
+                        update(Task)
+                        .where(Task.id == task.id)
+                        .execution_options(synchronize_session=False)
+                        .values(status=TaskStatus.RUNNING, started_at=started_at)
+                    )
+                    await db.commit()
+                
+                result = await processing
+                
+                # Update task with results
+                duration_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
+                
+                if result.get("success", False):
+                    status = TaskStatus.COMPLETED
+                    error_message = None
+                else:
+                    status = TaskStatus.FAILED
+                    error_message = result.get("error", "Unknown error")
+                
                 await db.execute(
                     update(Task)
                     .where(Task.id == task.id)
+                    .execution_options(synchronize_session=False)
                     .values(
                         status=status,
+                        started_at=started_at,
                         completed_at=datetime.utcnow(),
-                        result=result,
+                        output_data=result,
                         error_message=error_message
                     )
                 )
                 await db.commit()
-                break
-            
-            # Record metrics
-            monitoring_service.record_task_execution(
-                task_id=task.id,
-                status=status.value,
-                priority=task.priority.value,
-                duration_ms=duration_ms,
-                success=result.get("success", False),
-                error_message=error_message
-            )
-            
-            logger.info(f"Completed task {task.id} with LLM in {duration_ms:.0f}ms")
-            
-        except asyncio.CancelledError:
-            logger.info(f"Task {task.id} was cancelled")
-            
-            # Update status to cancelled
-            async for db in get_db():
+                
+                # Record metrics
+                monitoring_service.record_task_execution(
+                    task_id=task.id,
+                    status=status.value,
+                    priority=TaskPriority(task.priority).value,
+                    duration_ms=duration_ms,
+                    success=result.get("success", False),
+                    error_message=error_message
+                )
+                
+                logger.info(f"Completed task {task.id} with LLM in {duration_ms:.0f}ms")
+                
+            except asyncio.CancelledError:
+                logger.info(f"Task {task.id} was cancelled")
+                
+                # Update status to cancelled
+                await db.rollback()
                 await db.execute(
                     update(Task)
                     .where(Task.id == task.id)
-                    .values(status=TaskStatus.CANCELLED)
+                    .execution_options(synchronize_session=False)
+                    .values(status=TaskStatus.CANCELLED, started_at=started_at)
                 )
                 await db.commit()
-                break
-            
-            # Record metrics
-            duration_ms = (time.time() - start_time) * 1000
-            monitoring_service.record_task_execution(
-                task_id=task.id,
-                status=TaskStatus.CANCELLED.value,
-                priority=task.priority.value,
-                duration_ms=duration_ms,
-                success=False,
-                error_message="Task cancelled"
-            )
-        
-        except Exception as e:
-            logger.error(f"Error executing task {task.id}: {e}")
+                
+                # Record metrics
+                duration_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
+                monitoring_service.record_task_execution(
+                    task_id=task.id,
+                    status=TaskStatus.CANCELLED.value,
+                    priority=TaskPriority(task.priority).value,
+                    duration_ms=duration_ms,
+                    success=False,
+                    error_message="Task cancelled"
+                )
             
-            # Update status to failed
-            async for db in get_db():
+            except Exception as e:
+                logger.error(f"Error executing task {task.id}: {e}")
+                
+                # Update status to failed
+                await db.rollback()
                 await db.execute(
                     update(Task)
                     .where(Task.id == task.id)
+                    .execution_options(synchronize_session=False)
                     .values(
                         status=TaskStatus.FAILED,
+                        started_at=started_at,
                         error_message=str(e)
                     )
                 )
                 await db.commit()
-                break
+                
+                # Record metrics
+                duration_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
+                monitoring_service.record_task_execution(
+                    task_id=task.id,
+                    status=TaskStatus.FAILED.value,
+                    priority=TaskPriority(task.priority).value,
+                    duration_ms=duration_ms,
+                    success=False,
+                    error_message=str(e)
+                )
             
-            # Record metrics
-            duration_ms = (time.time() - start_time) * 1000
-            monitoring_service.record_task_execution(
-                task_id=task.id,
-                status=TaskStatus.FAILED.value,
-                priority=task.priority.value,
-                duration_ms=duration_ms,
-                success=False,
-                error_message=str(e)
-            )
-        
-        finally:
-            # Remove from active tasks
-            if task.id in self.active_tasks:
-                del self.active_tasks[task.id]
+            finally:
+                # Waiting on the LLM call doesn't cancel it along with this task
+                if processing is not None and not processing.done():
+                    processing.cancel()
     
-    async def _get_available_servers(self) -> List[MCPServer]:
-        """Get list of available MCP servers"""
+    async def _get_available_servers(self, db: Optional[AsyncSession] = None) -> List[MCPServer]:
+        """Get list of available MCP servers, on the caller's session when given"""
         try:
+            if db is not None:
+                result = await db.execute(
+                    select(MCPServer).where(MCPServer.is_active == True)
+                )
+                return list(result.scalars().all())
             async for db in get_db():
                 result = await db.execute(
                     select(MCPServer).where(MCPServer.is_active == True)
@@ -266,7 +371,7 @@ class TaskService:
                     return {"success": False, "error": "Task is not in pending status"}
                 
                 # Get available servers
-                available_servers = await self._get_available_servers()
+                available_servers = await self._get_available_servers(db)
                 
                 # Execute with custom LLM
                 result = await llm_service.process_task_with_llm(
@@ -281,10 +386,11 @@ class TaskService:
                 await db.execute(
                     update(Task)
                     .where(Task.id == task_id)
+                    .execution_options(synchronize_session=False)
                     .values(
                         status=status,
                         completed_at=datetime.utcnow(),
-                        result=result,
+                        output_data=result,
                         error_message=result.get("error") if not result.get("success") else None
                     )
                 )
@@ -315,18 +421,18 @@ class TaskService:
     async def get_task_stats(self, db: AsyncSession) -> Dict[str, Any]:
         """Get task statistics"""
         try:
-            # Get counts by status
-            stats = {}
+            # Get counts by status in a single grouped query
+            result = await db.execute(
+                select(Task.status, func.count(Task.id)).group_by(Task.status)
+            )
+            rows = result.all()
             
-            for status in TaskStatus:
-                result = await db.execute(
-                    select(Task).where(Task.status == status)
-                )
-                count = len(result.scalars().all())
-                stats[f"{status.value}_tasks"] = count
+            stats = {f"{status.value}_tasks": 0 for status in TaskStatus}
+            for status, count in rows:
+                stats[f"{TaskStatus(status).value}_tasks"] = count
             
             stats["active_tasks"] = len(self.active_tasks)
-            stats["total_tasks"] = sum(v for k, v in stats.items() if k.endswith("_tasks"))
+            stats["total_tasks"] = sum(count for _, count in rows)
             
             return stats
             
@@ -356,10 +462,11 @@ class TaskService:
                 await db.execute(
                     update(Task)
                     .where(Task.id == task_id)
+                    .execution_options(synchronize_session=False)
                     .values(
                         status=TaskStatus.PENDING,
                         error_message=None,
-                        result=None,
+                        output_data=None,
                         started_at=None,
                         completed_at=None,
                         updated_at=datetime.utcnow()
@@ -368,8 +475,7 @@ class TaskService:
                 await db.commit()
                 
                 # Start execution again
-                execution_task = asyncio.create_task(self._execute_task_with_llm(task))
-                self.active_tasks[task.id] = execution_task
+                await self.start_execution(task)
                 
                 return {"success": True, "message": "Task retry initiated"}
                 
@@ -380,29 +486,69 @@ class TaskService:
     async def cancel_task(self, task_id: int) -> Dict[str, Any]:
         """Cancel a running task"""
         try:
-            if task_id in self.active_tasks:
-                self.active_tasks[task_id].cancel()
-                del self.active_tasks[task_id]
-                
-                async for db in get_db():
-                    await db.execute(
-                        update(Task)
-                        .where(Task.id == task_id)
-                        .values(status=TaskStatus.CANCELLED)
+            execution = self.active_tasks.pop(task_id, None)
+            queued_id = self.queued_tasks.pop(task_id, None)
+            if execution is None and queued_id is None:
+                return {"success": False, "error": "Task is not running"}
+            
+            if execution is not None:
+                execution.cancel()
+            
+            # Queued executions may already have finished on a worker; only
+            # a task that is still pending or running becomes cancelled
+            cancelled = False
+            async for db in get_db():
+                result = await db.execute(
+                    update(Task)
+                    .where(
+                        Task.id == task_id,
+                        Task.status.in_([TaskStatus.PENDING, TaskStatus.RUNNING])
                     )
-                    await db.commit()
-                    break
+                    .execution_options(synchronize_session=False)
+                    .values(status=TaskStatus.CANCELLED)
+                )
+                await db.commit()
+                cancelled = result.rowcount > 0
+                break
+            
+            if queued_id is not None:
+                if not cancelled:
+                    return {"success": False, "error": "Task is not running"}
                 
-                return {"success": True, "message": "Task cancelled"}
-            else:
-                return {"success": False, "error": "Task is not running"}
+                from ..core.celery_app import celery_app
+                
+                await asyncio.to_thread(celery_app.control.revoke, queued_id, terminate=True)
+            
+            return {"success": True, "message": "Task cancelled"}
                 
         except Exception as e:
             logger.error(f"Error cancelling task {task_id}: {e}")
             return {"success": False, "error": str(e)}
     
     async def get_available_llm_providers(self) -> Dict[str, List[str]]:
-        """Get available LLM providers and their models"""
+        """
+        Get available LLM providers and their models
+        
+        Cached for LLM_MODELS_CACHE_TTL_SECONDS, since model lists change far
+        less often than this is requested. Concurrent callers on a cold cache
+        share one lookup.
+        """
+        cached = self._providers_cache
+        if cached and time.monotonic() - cached[0] < settings.LLM_MODELS_CACHE_TTL_SECONDS:
+            return dict(cached[1])
+        
+        inflight = self._providers_inflight
+        if inflight is None:
+            inflight = self._providers_inflight = asyncio.ensure_future(self._fetch_llm_providers())
+            inflight.add_done_callback(
+                lambda task: (
+                    setattr(self, "_providers_inflight", None)
+                    if self._providers_inflight is task else None
+                )
+            )
+        return dict(await asyncio.shield(inflight))
+    
+    async def _fetch_llm_providers(self) -> Dict[str, List[str]]:
         try:
             providers = {}
             
@@ -410,11 +556,17 @@ class TaskService:
                 models = await llm_service.get_available_models(provider)
                 providers[provider.value] = models
             
+            self._providers_cache = (time.monotonic(), providers)
             return providers
             
         except Exception as e:
             logger.error(f"Error getting LLM providers: {e}")
             return {}
+    
+    def clear_provider_cache(self):
+        """Forget cached LLM providers so the next lookup fetches them again"""
+        self._providers_cache = None
+        self._providers_inflight = None
 
 
 # Global task service instance
@@ -0,0 +1,60 @@
+"""
+Task Worker
+Celery entry points that execute tasks with LLM integration in worker processes
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from ..core.celery_app import celery_app
+from ..core.database import get_db
+from .task_service import task_service
+
+logger = logging.getLogger(__name__)
+
+# One event loop per worker process, so the shared service clients and
+# connection pools stay bound to a single loop across tasks
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _new_event_loop() -> asyncio.AbstractEventLoop:
+    # uvloop ships with uvicorn[standard]; the API server already picks it up
+    # through uvicorn's loop="auto", so workers match it when it is available
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.new_event_loop()
+    return uvloop.new_event_loop()
+
+
+def _run(coro):
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = _new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop.run_until_complete(coro)
+
+
+async def _execute(task_id: int):
+    task = None
+    async for db in get_db():
+        task = await task_service.get_task(db, task_id)
+        break
+    
+    if task is None:
+        logger.warning(f"Queued task {task_id} no longer exists")
+        return
+    
+    await task_service._execute_task_with_llm(task)
+
+
+@celery_app.task(bind=True, name="hisper.execute_task_with_llm", max_retries=3)
+def execute_task_with_llm(self, task_id: int):
+    """Run the LLM pipeline for a task; the outcome is written to the task row"""
+    try:
+        _run(_execute(task_id))
+    except Exception as e:
+        # Pipeline failures are recorded on the task; this only covers infrastructure errors
+        logger.error(f"Worker failed to execute task {task_id}: {e}")
+        raise self.retry(exc=e, countdown=10)
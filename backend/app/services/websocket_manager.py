@@ -2,106 +2,270 @@
 WebSocket connection manager for real-time updates
 """
 
-import json
+import asyncio
 import logging
-from typing import List, Dict, Any
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+import msgpack
+import orjson
+import redis.asyncio as redis
 from fastapi import WebSocket
 
 logger = logging.getLogger(__name__)
 
+# Clients offering this subprotocol get binary MessagePack frames for JSON events
+MSGPACK_SUBPROTOCOL = "msgpack"
+
+
+def _msgpack_default(obj: Any) -> Any:
+    # Match orjson's handling of the non-native types events carry
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not MessagePack serializable")
+
 
 class WebSocketManager:
-    """Manages WebSocket connections for real-time updates"""
+    """
+    Manages WebSocket connections for real-time updates
+    
+    Every connection has a bounded outbox drained by one sender task, so
+    broadcasting only enqueues a frame per client; a client whose outbox is
+    full has the frame dropped rather than slowing everyone else down.
+    """
+    
+    OUTBOX_SIZE = 256
+    # Backoff between attempts to resubscribe after the fanout connection drops
+    FANOUT_RETRY_DELAY = 1.0
+    FANOUT_RETRY_MAX_DELAY = 30.0
     
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
+        self.active_connections: Set[WebSocket] = set()
         self.connection_info: Dict[WebSocket, Dict[str, Any]] = {}
+        # Per-connection frame queue and the task writing it out
+        self._outboxes: Dict[WebSocket, asyncio.Queue] = {}
+        self._senders: Dict[WebSocket, asyncio.Task] = {}
+        # user_id -> that user's connections, so per-user sends skip a full scan
+        self.user_connections: Dict[str, Set[WebSocket]] = {}
+        # Connections that negotiated the MessagePack subprotocol
+        self.msgpack_connections: Set[WebSocket] = set()
+        # Cross-worker fanout; broadcasts go through Redis when set
+        self._redis: Optional[redis.Redis] = None
+        self._fanout_channel: Optional[str] = None
+        self._fanout_task: Optional[asyncio.Task] = None
+        # Whether relayed broadcasts currently reach this worker
+        self._fanout_subscribed = False
+    
+    async def start_fanout(self, redis_url: str, channel: str):
+        """
+        Relay broadcasts through Redis pub/sub
+        
+        With several worker processes each holds only its own clients, so
+        broadcasts are published to the channel and every worker, this one
+        included, delivers them to its local connections.
+        """
+        self._redis = redis.from_url(redis_url)
+        self._fanout_channel = channel
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(channel)
+        self._fanout_task = asyncio.create_task(self._run_fanout(pubsub))
+        logger.info(f"WebSocket broadcasts relayed through Redis channel {channel}")
+    
+    async def stop_fanout(self):
+        """Stop relaying broadcasts through Redis"""
+        if self._fanout_task is not None:
+            self._fanout_task.cancel()
+            try:
+                await self._fanout_task
+            except asyncio.CancelledError:
+                pass
+            self._fanout_task = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+    
+    async def _run_fanout(self, pubsub):
+        """
+        Deliver broadcasts published by any worker to this worker's clients
+        
+        If the subscription drops it is re-established with exponential
+        backoff; meanwhile _publish also delivers this worker's own
+        broadcasts locally.
+        """
+        delay = self.FANOUT_RETRY_DELAY
+        while True:
+            try:
+                if pubsub is None:
+                    pubsub = self._redis.pubsub()
+                    await pubsub.subscribe(self._fanout_channel)
+                    logger.info(f"Resubscribed to Redis channel {self._fanout_channel}")
+                self._fanout_subscribed = True
+                delay = self.FANOUT_RETRY_DELAY
+                
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    try:
+                        event = orjson.loads(message["data"])
+                        self._deliver(event)
+                    except Exception as e:
+                        logger.error(f"Error delivering relayed broadcast: {e}")
+                logger.warning("Redis fanout subscription ended")
+            except Exception as e:
+                logger.warning(f"Redis fanout subscription lost: {e}")
+            finally:
+                self._fanout_subscribed = False
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+                    pubsub = None
+            
+            logger.info(f"Resubscribing to Redis channel in {delay:.0f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.FANOUT_RETRY_MAX_DELAY)
+    
+    async def _publish(self, event: Dict[str, Any]):
+        """Broadcast an event to every worker's clients, or only ours without fanout"""
+        if self._redis is None:
+            self._deliver(event)
+            return
+        
+        try:
+            await self._redis.publish(self._fanout_channel, orjson.dumps(event))
+        except Exception as e:
+            logger.error(f"Error publishing broadcast, delivering locally only: {e}")
+            self._deliver(event)
+            return
+        
+        # Not subscribed right now: the relayed copy won't come back to us
+        if not self._fanout_subscribed:
+            self._deliver(event)
+    
+    def _deliver(self, event: Dict[str, Any]):
+        """Queue a broadcast event for the matching local connections"""
+        kind = event["kind"]
+        if kind == "text":
+            self._enqueue_all(self.active_connections, event["message"], "broadcasting message")
+        elif kind == "json":
+            if self.active_connections:
+                self._enqueue_data_all(self.active_connections, event["data"], "broadcasting JSON")
+        elif kind == "user":
+            user_id = event["user_id"]
+            user_connections = self.user_connections.get(user_id)
+            if user_connections:
+                self._enqueue_data_all(
+                    user_connections, event["data"], f"broadcasting to user {user_id}"
+                )
     
     async def connect(self, websocket: WebSocket, user_id: str = None):
-        """Accept a new WebSocket connection"""
-        await websocket.accept()
-        self.active_connections.append(websocket)
+        """
+        Accept a new WebSocket connection
+        
+        Clients that list the "msgpack" subprotocol receive JSON events as
+        MessagePack binary frames; everyone else keeps getting JSON text.
+        """
+        if MSGPACK_SUBPROTOCOL in websocket.scope.get("subprotocols", ()):
+            await websocket.accept(subprotocol=MSGPACK_SUBPROTOCOL)
+            self.msgpack_connections.add(websocket)
+        else:
+            await websocket.accept()
+        self.active_connections.add(websocket)
+        outbox = self._outboxes[websocket] = asyncio.Queue(maxsize=self.OUTBOX_SIZE)
+        self._senders[websocket] = asyncio.create_task(self._run_sender(websocket, outbox))
         self.connection_info[websocket] = {
             "user_id": user_id,
             "connected_at": None
         }
+        if user_id is not None:
+            self.user_connections.setdefault(user_id, set()).add(websocket)
         logger.info(f"WebSocket connection established. Total connections: {len(self.active_connections)}")
     
     def disconnect(self, websocket: WebSocket):
         """Remove a WebSocket connection"""
         if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-            self.connection_info.pop(websocket, None)
+            self.active_connections.discard(websocket)
+            self.msgpack_connections.discard(websocket)
+            self._outboxes.pop(websocket, None)
+            sender = self._senders.pop(websocket, None)
+            if sender is not None and sender is not asyncio.current_task():
+                sender.cancel()
+            info = self.connection_info.pop(websocket, None)
+            
+            user_id = info.get("user_id") if info else None
+            connections = self.user_connections.get(user_id)
+            if connections is not None:
+                connections.discard(websocket)
+                if not connections:
+                    del self.user_connections[user_id]
             logger.info(f"WebSocket connection closed. Total connections: {len(self.active_connections)}")
     
+    async def _run_sender(self, websocket: WebSocket, outbox: asyncio.Queue):
+        """Write queued frames (text for str, binary for bytes) to one connection in order"""
+        while True:
+            payload = await outbox.get()
+            try:
+                if isinstance(payload, bytes):
+                    await websocket.send_bytes(payload)
+                else:
+                    await websocket.send_text(payload)
+            except Exception as e:
+                logger.error(f"Error sending WebSocket message: {e}")
+                self.disconnect(websocket)
+                return
+    
+    def _enqueue(self, websocket: WebSocket, payload: Union[str, bytes], context: str):
+        outbox = self._outboxes.get(websocket)
+        if outbox is None:
+            return
+        try:
+            outbox.put_nowait(payload)
+        except asyncio.QueueFull:
+            logger.warning(f"Dropped message {context}: client outbox is full")
+    
+    def _enqueue_all(self, connections: Iterable[WebSocket], payload: Union[str, bytes], context: str):
+        """Queue one frame for several connections"""
+        for connection in connections:
+            self._enqueue(connection, payload, context)
+    
     async def send_personal_message(self, message: str, websocket: WebSocket):
         """Send a message to a specific WebSocket connection"""
-        try:
-            await websocket.send_text(message)
-        except Exception as e:
-            logger.error(f"Error sending personal message: {e}")
-            self.disconnect(websocket)
+        self._enqueue(websocket, message, "sending personal message")
     
     async def send_personal_json(self, data: Dict[str, Any], websocket: WebSocket):
         """Send JSON data to a specific WebSocket connection"""
-        try:
-            await websocket.send_json(data)
-        except Exception as e:
-            logger.error(f"Error sending personal JSON: {e}")
-            self.disconnect(websocket)
+        if websocket in self.msgpack_connections:
+            payload = msgpack.packb(data, default=_msgpack_default)
+        else:
+            payload = orjson.dumps(data).decode()
+        self._enqueue(websocket, payload, "sending personal JSON")
     
     async def broadcast(self, message: str):
         """Broadcast a message to all connected clients"""
-        if not self.active_connections:
-            return
-        
-        disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except Exception as e:
-                logger.error(f"Error broadcasting message: {e}")
-                disconnected.append(connection)
+        await self._publish({"kind": "text", "message": message})
+    
+    def _enqueue_data_all(self, connections: Iterable[WebSocket], data: Dict[str, Any], context: str):
+        """Queue an event for several connections, encoded once per wire format"""
+        json_connections = []
+        msgpack_connections = []
+        for connection in connections:
+            if connection in self.msgpack_connections:
+                msgpack_connections.append(connection)
+            else:
+                json_connections.append(connection)
         
-        # Remove disconnected connections
-        for connection in disconnected:
-            self.disconnect(connection)
+        if json_connections:
+            self._enqueue_all(json_connections, orjson.dumps(data).decode(), context)
+        if msgpack_connections:
+            self._enqueue_all(msgpack_connections, msgpack.packb(data, default=_msgpack_default), context)
     
     async def broadcast_json(self, data: Dict[str, Any]):
         """Broadcast JSON data to all connected clients"""
-        if not self.active_connections:
-            return
-        
-        disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(data)
-            except Exception as e:
-                logger.error(f"Error broadcasting JSON: {e}")
-                disconnected.append(connection)
-        
-        # Remove disconnected connections
-        for connection in disconnected:
-            self.disconnect(connection)
+        await self._publish({"kind": "json", "data": data})
     
     async def broadcast_to_user(self, user_id: str, data: Dict[str, Any]):
         """Broadcast data to all connections for a specific user"""
-        user_connections = [
-            conn for conn, info in self.connection_info.items()
-            if info.get("user_id") == user_id
-        ]
-        
-        disconnected = []
-        for connection in user_connections:
-            try:
-                await connection.send_json(data)
-            except Exception as e:
-                logger.error(f"Error broadcasting to user {user_id}: {e}")
-                disconnected.append(connection)
-        
-        # Remove disconnected connections
-        for connection in disconnected:
-            self.disconnect(connection)
+        await self._publish({"kind": "user", "user_id": user_id, "data": data})
     
     async def notify_server_discovered(self, server_data: Dict[str, Any]):
         """Notify all clients about a newly discovered server"""
@@ -4,12 +4,19 @@ Main FastAPI application entry point
 """
 
 import asyncio
+import gzip
 import logging
+import os
+import queue
+import sys
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from typing import Callable
+from pathlib import Path
+from logging.handlers import QueueHandler, QueueListener
+from fastapi import FastAPI, Header, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
+import orjson
 import uvicorn
 
 from app.api import router as api_router
@@ -19,10 +26,11 @@ from app.services.discovery_service import DiscoveryService
 from app.services.websocket_manager import WebSocketManager
 from app.services.monitoring_service import monitoring_service
 from app.services.mcp_client import mcp_client
+from app.services.llm_service import llm_service
 
 # Configure logging
 logging.basicConfig(
-    level=logging.INFO,
+    level=settings.LOG_LEVEL.upper(),
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 logger = logging.getLogger(__name__)
@@ -32,29 +40,78 @@ websocket_manager = WebSocketManager()
 discovery_service = DiscoveryService()
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Application lifespan manager"""
-    logger.info("Starting Hisper application...")
-    
-    # Initialize database
-    await init_db()
+def _queue_root_logging() -> Callable[[], None]:
+    """
+    Put the root logger's handlers behind a queue
     
-    # Start background services
-    asyncio.create_task(discovery_service.start_periodic_discovery())
+    Handlers write on a background thread, so logging calls on the event
+    loop only enqueue the record. Returns a function that restores the
+    original handlers and stops the listener once the queue is drained.
+    """
+    root_logger = logging.getLogger()
+    handlers = root_logger.handlers[:]
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    root_logger.handlers = [QueueHandler(log_queue)]
+    listener.start()
     
-    # Start monitoring service
-    if settings.MONITORING_ENABLED:
-        await monitoring_service.start_monitoring()
-        logger.info("Monitoring service started")
+    def restore():
+        root_logger.handlers = handlers
+        listener.stop()
     
-    logger.info("Hisper application started successfully")
-    yield
+    return restore
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application lifespan manager"""
+    restore_logging = _queue_root_logging()
+    try:
+        logger.info("Starting Hisper application...")
+        
+        # Run new tasks eagerly up to their first suspension (Python 3.12+)
+        eager_task_factory = getattr(asyncio, "eager_task_factory", None)
+        if eager_task_factory is not None:
+            asyncio.get_running_loop().set_task_factory(eager_task_factory)
+        
+        # Initialize the database and, for worker processes sharing WebSocket
+        # broadcasts, subscribe to Redis; neither depends on the other
+        startup = [init_db()]
+        if settings.HISPER_ENV == "prod":
+            startup.append(
+                websocket_manager.start_fanout(settings.REDIS_URL, settings.WS_FANOUT_CHANNEL)
+            )
+        await asyncio.gather(*startup)
+        
+        # Start background services; the service keeps the one long-lived task so
+        # it isn't garbage collected and stop() can cancel it
+        discovery_service.discovery_task = asyncio.create_task(
+            discovery_service.start_periodic_discovery()
+        )
+        
+        # Start monitoring service
+        if settings.MONITORING_ENABLED:
+            await monitoring_service.start_monitoring()
+            logger.info("Monitoring service started")
+        
+        logger.info("Hisper application started successfully")
+        yield
+        
+        logger.info("Shutting down Hisper application...")
+        await discovery_service.stop()
+        await monitoring_service.stop_monitoring()
+        await websocket_manager.stop_fanout()
+        await mcp_client.cleanup()
+        await llm_service.aclose()
+    finally:
+        restore_logging()
+
+
+class HisperJSONResponse(ORJSONResponse):
+    """orjson rendering that also accepts the integer-keyed dicts some endpoints return"""
     
-    logger.info("Shutting down Hisper application...")
-    await discovery_service.stop()
-    await monitoring_service.stop_monitoring()
-    await mcp_client.cleanup()
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
 
 
 # Create FastAPI app
@@ -62,17 +119,20 @@ app = FastAPI(
     title="Hisper - MCP Server Discovery Interface",
     description="An intelligent interface for discovering and managing MCP servers across various domains",
     version="1.0.0",
+    default_response_class=HisperJSONResponse,
     lifespan=lifespan
 )
 
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Configure CORS for the listed origins; the bundled frontend proxies through
+# its dev server, so no middleware is needed when none are configured
+if settings.BACKEND_CORS_ORIGINS:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.BACKEND_CORS_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
 
 # Include API routes
 app.include_router(api_router, prefix="/api/v1")
@@ -84,79 +144,77 @@ async def websocket_endpoint(websocket: WebSocket):
     try:
         while True:
             data = await websocket.receive_text()
-            await websocket_manager.broadcast(f"Echo: {data}")
+            # Echo back to the sender only; fanning each inbound frame out to
+            # every client made traffic grow with the square of the client count
+            await websocket_manager.send_personal_message("Echo: " + data, websocket)
     except WebSocketDisconnect:
         websocket_manager.disconnect(websocket)
 
 
-# Health check endpoint
-@app.get("/health")
+# Health check endpoint; the body never changes, so it is encoded once
+_HEALTH_BODY: bytes = b'{"status":"healthy","service":"hisper","version":"1.0.0"}'
+
+
+@app.get("/health", response_class=Response, include_in_schema=False)
 async def health_check():
-    return {
-        "status": "healthy",
-        "service": "hisper",
-        "version": "1.0.0"
-    }
+    return Response(content=_HEALTH_BODY, media_type="application/json")
+
+
+# Root page, read and gzipped once at import; it is small enough that serving
+# it from memory beats streaming the file on every request
+_ROOT_HTML: bytes = (Path(__file__).parent / "static" / "index.html").read_bytes()
+_ROOT_HTML_GZIP: bytes = gzip.compress(_ROOT_HTML)
+
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding header allows gzip, honouring q-values and the * wildcard"""
+    wildcard_q = None
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding in ("gzip", "x-gzip"):
+            return q > 0
+        if coding == "*":
+            wildcard_q = q
+    return wildcard_q is not None and wildcard_q > 0
 
 
 # Root endpoint
-@app.get("/")
-async def root():
-    return HTMLResponse("""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Hisper - MCP Server Discovery Interface</title>
-        <style>
-            body { font-family: Arial, sans-serif; margin: 40px; background: #f5f5f5; }
-            .container { max-width: 800px; margin: 0 auto; background: white; padding: 40px; border-radius: 10px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }
-            h1 { color: #333; text-align: center; }
-            .feature { margin: 20px 0; padding: 15px; background: #f8f9fa; border-radius: 5px; }
-            .api-link { display: inline-block; margin: 10px; padding: 10px 20px; background: #007bff; color: white; text-decoration: none; border-radius: 5px; }
-            .api-link:hover { background: #0056b3; }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h1>🚀 Hisper - MCP Server Discovery Interface</h1>
-            <p>Welcome to Hisper, an intelligent interface for discovering and managing Model Context Protocol (MCP) servers across various domains.</p>
-            
-            <div class="feature">
-                <h3>🔍 Server Discovery</h3>
-                <p>Automatically discovers MCP servers from GitHub, npm, PyPI, and other sources</p>
-            </div>
-            
-            <div class="feature">
-                <h3>🎯 Intelligent Task Routing</h3>
-                <p>Routes tasks to the most appropriate MCP servers based on their capabilities</p>
-            </div>
-            
-            <div class="feature">
-                <h3>📊 Real-time Monitoring</h3>
-                <p>Monitor server health, performance, and task execution in real-time</p>
-            </div>
-            
-            <div class="feature">
-                <h3>🌐 Web Interface</h3>
-                <p>User-friendly web interface for managing servers and tasks</p>
-            </div>
-            
-            <div style="text-align: center; margin-top: 30px;">
-                <a href="/docs" class="api-link">📚 API Documentation</a>
-                <a href="/api/v1/servers" class="api-link">🖥️ View Servers</a>
-                <a href="/api/v1/tasks" class="api-link">📋 View Tasks</a>
-            </div>
-        </div>
-    </body>
-    </html>
-    """)
+@app.get("/", response_class=HTMLResponse)
+async def root(accept_encoding: str = Header("")):
+    headers = {"vary": "accept-encoding"}
+    if _accepts_gzip(accept_encoding):
+        headers["content-encoding"] = "gzip"
+        return Response(content=_ROOT_HTML_GZIP, media_type="text/html", headers=headers)
+    return Response(content=_ROOT_HTML, media_type="text/html", headers=headers)
 
 
 if __name__ == "__main__":
+    if settings.HISPER_ENV == "prod":
+        # One worker per core; reload can't be combined with several workers
+        server_options = dict(workers=settings.WEB_CONCURRENCY or os.cpu_count() or 1)
+    else:
+        server_options = dict(reload=True)
+    
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=12000,
-        reload=True,
-        log_level="info"
+        # Compiled event loop and HTTP parser from uvicorn[standard]; uvloop
+        # doesn't support Windows
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        ws="websockets",
+        log_level=settings.LOG_LEVEL.lower(),
+        # A log line per request is costly on the hot path; keep it for development
+        access_log=settings.HISPER_ENV != "prod",
+        **server_options
     )
\ No newline at end of file
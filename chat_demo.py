@@ -4,15 +4,21 @@ Hisper Chat Interface Demo Script
 Demonstrates the new AI-powered chat interface for interacting with MCP servers
 """
 
-import requests
-import json
-import time
+import asyncio
+import httpx
+import orjson
 from typing import Dict, List, Any
 
 # Configuration
 BASE_URL = "http://localhost:12000"
 API_BASE = f"{BASE_URL}/api/v1"
 
+# One pooled client so every call reuses a kept-alive connection
+client = httpx.Client(
+    timeout=30,
+    limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+)
+
 def print_header(title: str):
     """Print a formatted header"""
     print(f"\n{'='*70}")
@@ -23,14 +29,14 @@ def print_json(data: Any, title: str = ""):
     """Pretty print JSON data"""
     if title:
         print(f"\n{title}:")
-    print(json.dumps(data, indent=2, default=str))
+    print(orjson.dumps(data, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode())
 
 def test_chat_suggestions():
     """Test chat suggestions endpoint"""
     try:
         print("\n🎯 Testing Chat Suggestions:")
         
-        response = requests.get(f"{API_BASE}/chat/suggestions", timeout=10)
+        response = client.get(f"{API_BASE}/chat/suggestions", timeout=10)
         if response.status_code == 200:
             suggestions = response.json()
             print_json(suggestions, "Available Chat Suggestions")
@@ -55,7 +61,7 @@ def test_chat_analysis(message: str):
             "context": []
         }
         
-        response = requests.post(f"{API_BASE}/chat/analyze", json=analysis_data, timeout=30)
+        response = client.post(f"{API_BASE}/chat/analyze", json=analysis_data, timeout=30)
         if response.status_code == 200:
             analysis = response.json()
             print_json(analysis, "AI Analysis Result")
@@ -70,6 +76,34 @@ def test_chat_analysis(message: str):
         print(f"Error testing chat analysis: {e}")
         return None
 
+def test_chat_analysis_batch(messages: List[str]) -> List[Dict]:
+    """Analyze several messages with a single batched request"""
+    try:
+        print(f"\n🧠 Analyzing {len(messages)} messages in one batch")
+        
+        batch_data = {
+            "messages": [
+                {
+                    "message": message,
+                    "provider": "openrouter",
+                    "model": "deepseek/deepseek-chat",
+                    "context": []
+                }
+                for message in messages
+            ]
+        }
+        
+        response = client.post(f"{API_BASE}/chat/analyze/batch", json=batch_data, timeout=60)
+        if response.status_code == 200:
+            return response.json()["results"]
+        else:
+            print(f"Batch analysis failed: {response.status_code}")
+            return [None] * len(messages)
+            
+    except Exception as e:
+        print(f"Error testing batch analysis: {e}")
+        return [None] * len(messages)
+
 def test_chat_execution(action: Dict[str, Any]):
     """Test chat action execution"""
     try:
@@ -81,7 +115,7 @@ def test_chat_execution(action: Dict[str, Any]):
             "model": "deepseek/deepseek-chat"
         }
         
-        response = requests.post(f"{API_BASE}/chat/execute", json=execution_data, timeout=30)
+        response = client.post(f"{API_BASE}/chat/execute", json=execution_data, timeout=30)
         if response.status_code == 200:
             result = response.json()
             print_json(result, "Execution Result")
@@ -101,7 +135,7 @@ def test_chat_providers():
     try:
         print("\n🤖 Testing Available Chat Providers:")
         
-        response = requests.get(f"{API_BASE}/chat/providers", timeout=10)
+        response = client.get(f"{API_BASE}/chat/providers", timeout=10)
         if response.status_code == 200:
             providers = response.json()
             print_json(providers, "Available LLM Providers for Chat")
@@ -119,7 +153,7 @@ def test_chat_stats():
     try:
         print("\n📊 Testing Chat Statistics:")
         
-        response = requests.get(f"{API_BASE}/chat/stats", timeout=10)
+        response = client.get(f"{API_BASE}/chat/stats", timeout=10)
         if response.status_code == 200:
             stats = response.json()
             print_json(stats, "Chat Usage Statistics")
@@ -144,12 +178,15 @@ def simulate_chat_conversation():
         "Create a task to analyze the Microsoft VS Code repository"
     ]
     
-    for i, message in enumerate(test_messages, 1):
+    # The turns don't depend on each other's analysis, so fetch them together
+    analyses = test_chat_analysis_batch(test_messages)
+    
+    for i, (message, analysis) in enumerate(zip(test_messages, analyses), 1):
         print(f"\n--- Chat Turn {i} ---")
         print(f"User: {message}")
         
-        # Analyze the message
-        analysis = test_chat_analysis(message)
+        if analysis and "error" not in analysis:
+            print_json(analysis, "AI Analysis Result")
         
         if analysis and analysis.get("suggestedActions"):
             # Execute the first suggested action
@@ -163,12 +200,14 @@ def simulate_chat_conversation():
                 print(f"Result: {execution_result.get('result', 'No result')[:200]}...")
             else:
                 print(f"❌ Action failed")
-        
-        # Add a small delay between messages
-        time.sleep(2)
 
-def test_frontend_integration():
-    """Test frontend integration points"""
+async def _probe_endpoint(async_client: httpx.AsyncClient, endpoint: str, method: str, data: Any):
+    if method == "GET":
+        return await async_client.get(f"{API_BASE}{endpoint}", timeout=10)
+    return await async_client.post(f"{API_BASE}{endpoint}", json=data, timeout=30)
+
+async def test_frontend_integration():
+    """Test frontend integration points, probing every endpoint concurrently"""
     print_header("Testing Frontend Integration Points")
     
     # Test all the endpoints that the frontend will use
@@ -183,20 +222,25 @@ def test_frontend_integration():
         }),
     ]
     
-    for endpoint, method, data in endpoints_to_test:
+    async with httpx.AsyncClient() as async_client:
+        responses = await asyncio.gather(
+            *(_probe_endpoint(async_client, endpoint, method, data)
+              for endpoint, method, data in endpoints_to_test),
+            return_exceptions=True
+        )
+    
+    for (endpoint, method, _), response in zip(endpoints_to_test, responses):
         try:
             print(f"\n🔗 Testing {method} {endpoint}")
             
-            if method == "GET":
-                response = requests.get(f"{API_BASE}{endpoint}", timeout=10)
-            else:
-                response = requests.post(f"{API_BASE}{endpoint}", json=data, timeout=30)
+            if isinstance(response, Exception):
+                raise response
             
             if response.status_code == 200:
                 print(f"✅ {endpoint} - Success")
                 result = response.json()
-                if isinstance(result, dict) and len(str(result)) > 500:
-                    print(f"   Response: Large response ({len(str(result))} chars)")
+                if isinstance(result, dict) and len(response.content) > 500:
+                    print(f"   Response: Large response ({len(response.content)} bytes)")
                 else:
                     print(f"   Response: {result}")
             else:
@@ -211,7 +255,7 @@ def main():
     
     # Test basic health
     try:
-        response = requests.get(f"{BASE_URL}/health", timeout=5)
+        response = client.get(f"{BASE_URL}/health", timeout=5)
         if response.status_code == 200:
             print("✅ Backend is healthy and operational!")
         else:
@@ -231,7 +275,7 @@ def main():
     stats = test_chat_stats()
     
     # Test frontend integration
-    test_frontend_integration()
+    asyncio.run(test_frontend_integration())
     
     # Simulate a complete conversation
     simulate_chat_conversation()
@@ -276,4 +320,7 @@ def main():
     """)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    finally:
+        client.close()
\ No newline at end of file
@@ -4,8 +4,8 @@ Hisper API Demo Script
 Demonstrates the functionality of the Hisper MCP Server Discovery Platform
 """
 
-import requests
-import json
+import httpx
+import orjson
 import time
 from typing import Dict, List, Any
 
@@ -13,6 +13,12 @@ from typing import Dict, List, Any
 BASE_URL = "http://localhost:12000"
 API_BASE = f"{BASE_URL}/api/v1"
 
+# One pooled client so every call reuses a kept-alive connection
+client = httpx.Client(
+    timeout=30,
+    limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+)
+
 def print_header(title: str):
     """Print a formatted header"""
     print(f"\n{'='*60}")
@@ -23,12 +29,12 @@ def print_json(data: Any, title: str = ""):
     """Pretty print JSON data"""
     if title:
         print(f"\n{title}:")
-    print(json.dumps(data, indent=2, default=str))
+    print(orjson.dumps(data, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode())
 
 def check_health() -> bool:
     """Check if the API is healthy"""
     try:
-        response = requests.get(f"{BASE_URL}/health", timeout=5)
+        response = client.get(f"{BASE_URL}/health", timeout=5)
         if response.status_code == 200:
             health_data = response.json()
             print_json(health_data, "Health Check")
@@ -43,7 +49,7 @@ def check_health() -> bool:
 def get_server_stats() -> Dict:
     """Get server statistics"""
     try:
-        response = requests.get(f"{API_BASE}/servers/stats", timeout=10)
+        response = client.get(f"{API_BASE}/servers/stats", timeout=10)
         if response.status_code == 200:
             return response.json()
         else:
@@ -56,7 +62,7 @@ def get_server_stats() -> Dict:
 def get_servers(limit: int = 10) -> List[Dict]:
     """Get list of discovered servers"""
     try:
-        response = requests.get(f"{API_BASE}/servers/?limit={limit}", timeout=10)
+        response = client.get(f"{API_BASE}/servers/?limit={limit}", timeout=10)
         if response.status_code == 200:
             return response.json()
         else:
@@ -69,7 +75,7 @@ def get_servers(limit: int = 10) -> List[Dict]:
 def get_server_details(server_id: int) -> Dict:
     """Get detailed information about a specific server"""
     try:
-        response = requests.get(f"{API_BASE}/servers/{server_id}", timeout=10)
+        response = client.get(f"{API_BASE}/servers/{server_id}", timeout=10)
         if response.status_code == 200:
             return response.json()
         else:
@@ -93,7 +99,7 @@ def create_sample_task(server_id: int) -> Dict:
     }
     
     try:
-        response = requests.post(f"{API_BASE}/tasks/", json=task_data, timeout=10)
+        response = client.post(f"{API_BASE}/tasks/", json=task_data, timeout=10)
         if response.status_code == 201:
             return response.json()
         else:
@@ -106,7 +112,7 @@ def create_sample_task(server_id: int) -> Dict:
 def get_tasks(limit: int = 5) -> List[Dict]:
     """Get list of tasks"""
     try:
-        response = requests.get(f"{API_BASE}/tasks/?limit={limit}", timeout=10)
+        response = client.get(f"{API_BASE}/tasks/?limit={limit}", timeout=10)
         if response.status_code == 200:
             return response.json()
         else:
@@ -119,7 +125,7 @@ def get_tasks(limit: int = 5) -> List[Dict]:
 def trigger_discovery() -> Dict:
     """Trigger manual discovery"""
     try:
-        response = requests.post(f"{API_BASE}/discovery/discover", timeout=30)
+        response = client.post(f"{API_BASE}/discovery/discover", timeout=30)
         if response.status_code == 200:
             return response.json()
         else:
@@ -261,4 +267,7 @@ def main():
     print("   • Database: SQLite file at backend/hisper.db")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    finally:
+        client.close()
\ No newline at end of file
@@ -4,33 +4,123 @@ Enhanced Hisper Demo Script
 Demonstrates the enhanced functionality including LLM integration, MCP communication, and monitoring
 """
 
-import requests
-import json
+import httpx
+import io
+import orjson
+import os
+import sys
+import threading
 import time
-from typing import Dict, List, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Any
 
 # Configuration
 BASE_URL = "http://localhost:12000"
 API_BASE = f"{BASE_URL}/api/v1"
+HEALTH_URL = f"{BASE_URL}/health"
+
+# Indenting dominates the cost of dumping responses; only do it for a person
+# reading a terminal (or when asked), and write compact lines to pipes and logs
+JSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+if sys.stdout.isatty() or os.environ.get("HISPER_DEMO_VERBOSE") == "1":
+    JSON_OPTIONS |= orjson.OPT_INDENT_2
+
+# Status codes worth polling through instead of giving up
+TRANSIENT_STATUS_CODES = {502, 503, 504}
+
+# Request bodies are serialized with orjson and sent as raw bytes
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Header rule, built once
+_SEP = b"=" * 70 + b"\n"
+
+# Server list lookups, keyed by limit; the list doesn't change during a run
+_SERVER_CACHE: Dict[int, List[Dict[str, Any]]] = {}
+
+# One pooled client so every call reuses a kept-alive connection. Its
+# transport retries failed connection attempts itself; with a custom
+# transport, the pool limits have to be set there rather than on the client
+client = httpx.Client(
+    base_url=API_BASE,
+    timeout=30,
+    transport=httpx.HTTPTransport(
+        retries=3,
+        limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+    )
+)
+
+class PhaseOutput:
+    """
+    Stand-in for sys.stdout that lets concurrently running demo phases
+    collect their output separately, so it can be shown phase by phase
+    
+    Threads that haven't called capture() write straight through.
+    """
+    
+    def __init__(self, target):
+        self._target = target
+        self._local = threading.local()
+    
+    def capture(self):
+        self._local.buffer = io.BytesIO()
+    
+    def release(self) -> bytes:
+        captured = self._local.buffer.getvalue()
+        del self._local.buffer
+        return captured
+    
+    @property
+    def buffer(self):
+        return getattr(self._local, "buffer", None) or self._target.buffer
+    
+    def write(self, text: str) -> int:
+        captured = getattr(self._local, "buffer", None)
+        if captured is None:
+            return self._target.write(text)
+        captured.write(text.encode())
+        return len(text)
+    
+    def flush(self):
+        if getattr(self._local, "buffer", None) is None:
+            self._target.flush()
+    
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+def run_phase(title: str, phase: Callable[[], Any]) -> bytes:
+    """Run one demo phase under its header and return everything it printed"""
+    sys.stdout.capture()
+    try:
+        print_header(title)
+        phase()
+    finally:
+        captured = sys.stdout.release()
+    return captured
+
+def write_output(captured: bytes):
+    sys.stdout.flush()
+    sys.stdout.buffer.write(captured)
 
 def print_header(title: str):
-    """Print a formatted header"""
-    print(f"\n{'='*70}")
-    print(f"  {title}")
-    print(f"{'='*70}")
+    """Print a formatted header as one write of UTF-8 bytes"""
+    sys.stdout.flush()
+    sys.stdout.buffer.write(b"\n" + _SEP + f"  {title}\n".encode() + _SEP)
 
 def print_json(data: Any, title: str = ""):
-    """Pretty print JSON data"""
-    if title:
-        print(f"\n{title}:")
-    print(json.dumps(data, indent=2, default=str))
+    """Pretty print JSON data as one write of UTF-8 bytes"""
+    chunks = [f"\n{title}:\n".encode()] if title else []
+    chunks.append(orjson.dumps(data, default=str, option=JSON_OPTIONS))
+    chunks.append(b"\n")
+    # Flush pending print() text first so output stays in order
+    sys.stdout.flush()
+    sys.stdout.buffer.write(b"".join(chunks))
 
 def test_health():
     """Test system health"""
     try:
-        response = requests.get(f"{BASE_URL}/health", timeout=5)
+        response = client.get(HEALTH_URL, timeout=5)
         if response.status_code == 200:
-            print_json(response.json(), "System Health")
+            print_json(orjson.loads(response.content), "System Health")
             return True
         else:
             print(f"Health check failed: {response.status_code}")
@@ -39,30 +129,46 @@ def test_health():
         print(f"Health check error: {e}")
         return False
 
+def get_all(paths: List[str], timeout: float = 10) -> List[httpx.Response]:
+    """GET independent endpoints in parallel over the shared client, in input order"""
+    with ThreadPoolExecutor(max_workers=len(paths)) as pool:
+        return list(pool.map(lambda path: client.get(path, timeout=timeout), paths))
+
+def post_json(path: str, data: Any, timeout: float = 10) -> httpx.Response:
+    """POST a body serialized with orjson, sent as ready-made bytes"""
+    return client.post(path, content=orjson.dumps(data), headers=JSON_HEADERS, timeout=timeout)
+
+def get_servers(limit: int = 1) -> List[Dict[str, Any]]:
+    """Registered servers, fetched once per limit for the rest of the run"""
+    if limit not in _SERVER_CACHE:
+        response = client.get(f"/servers/?limit={limit}", timeout=10)
+        if response.status_code != 200:
+            return []
+        _SERVER_CACHE[limit] = orjson.loads(response.content)
+    return _SERVER_CACHE[limit]
+
 def test_monitoring():
     """Test monitoring endpoints"""
     try:
         print("\n🔍 Testing Monitoring System:")
         
-        # System health
-        response = requests.get(f"{API_BASE}/monitoring/health", timeout=10)
-        if response.status_code == 200:
-            print_json(response.json(), "System Health Status")
-        
-        # Monitoring status
-        response = requests.get(f"{API_BASE}/monitoring/status", timeout=10)
-        if response.status_code == 200:
-            print_json(response.json(), "Monitoring Service Status")
-        
-        # Metrics summary
-        response = requests.get(f"{API_BASE}/monitoring/metrics/summary?hours=1", timeout=10)
-        if response.status_code == 200:
-            print_json(response.json(), "Metrics Summary (Last Hour)")
-        
-        # Active alerts
-        response = requests.get(f"{API_BASE}/monitoring/alerts", timeout=10)
-        if response.status_code == 200:
-            print_json(response.json(), "Active Alerts")
+        # System health, service status, metrics summary and active alerts
+        # don't depend on each other, so fetch them together
+        responses = get_all([
+            "/monitoring/health",
+            "/monitoring/status",
+            "/monitoring/metrics/summary?hours=1",
+            "/monitoring/alerts"
+        ])
+        titles = [
+            "System Health Status",
+            "Monitoring Service Status",
+            "Metrics Summary (Last Hour)",
+            "Active Alerts"
+        ]
+        for response, title in zip(responses, titles):
+            if response.status_code == 200:
+                print_json(orjson.loads(response.content), title)
         
         return True
         
@@ -76,9 +182,9 @@ def test_llm_providers():
         print("\n🤖 Testing LLM Integration:")
         
         # Get available providers
-        response = requests.get(f"{API_BASE}/llm/providers", timeout=10)
+        response = client.get("/llm/providers", timeout=10)
         if response.status_code == 200:
-            providers = response.json()
+            providers = orjson.loads(response.content)
             print_json(providers, "Available LLM Providers")
             
             # Test connection to OpenRouter (free model)
@@ -88,9 +194,9 @@ def test_llm_providers():
                     "model": "deepseek/deepseek-chat"
                 }
                 
-                response = requests.post(f"{API_BASE}/llm/test-connection", json=test_data, timeout=30)
+                response = post_json("/llm/test-connection", test_data, timeout=30)
                 if response.status_code == 200:
-                    print_json(response.json(), "LLM Connection Test")
+                    print_json(orjson.loads(response.content), "LLM Connection Test")
                 else:
                     print(f"LLM connection test failed: {response.status_code}")
             
@@ -108,44 +214,46 @@ def test_mcp_client():
     try:
         print("\n🔌 Testing MCP Client:")
         
-        # Get MCP status
-        response = requests.get(f"{API_BASE}/mcp/status", timeout=10)
-        if response.status_code == 200:
-            print_json(response.json(), "MCP Client Status")
+        # MCP status, active connections and a candidate server, fetched together
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            servers = pool.submit(get_servers)
+            status_response, connections_response = get_all([
+                "/mcp/status",
+                "/mcp/connections"
+            ])
+            servers = servers.result()
+        if status_response.status_code == 200:
+            print_json(orjson.loads(status_response.content), "MCP Client Status")
         
-        # Get active connections
-        response = requests.get(f"{API_BASE}/mcp/connections", timeout=10)
-        if response.status_code == 200:
-            print_json(response.json(), "Active MCP Connections")
+        if connections_response.status_code == 200:
+            print_json(orjson.loads(connections_response.content), "Active MCP Connections")
         
         # Try to connect to a server (using first available server)
-        servers_response = requests.get(f"{API_BASE}/servers/?limit=1", timeout=10)
-        if servers_response.status_code == 200:
-            servers = servers_response.json()
-            if servers:
-                server = servers[0]
-                print(f"\n🔗 Attempting to connect to server: {server['name']}")
+        if servers:
+            server = servers[0]
+            print(f"\n🔗 Attempting to connect to server: {server['name']}")
+            
+            connect_data = {"server_id": server["id"]}
+            response = post_json("/mcp/connect", connect_data, timeout=30)
+            
+            if response.status_code == 200:
+                print_json(orjson.loads(response.content), "MCP Connection Result")
                 
-                connect_data = {"server_id": server["id"]}
-                response = requests.post(f"{API_BASE}/mcp/connect", json=connect_data, timeout=30)
+                # List tools and get server capabilities together
+                tools_response, capabilities_response = get_all([
+                    f"/mcp/servers/{server['id']}/tools",
+                    f"/mcp/servers/{server['id']}/capabilities"
+                ])
+                if tools_response.status_code == 200:
+                    print_json(orjson.loads(tools_response.content), f"Available Tools for {server['name']}")
                 
-                if response.status_code == 200:
-                    print_json(response.json(), "MCP Connection Result")
-                    
-                    # Try to list tools
-                    response = requests.get(f"{API_BASE}/mcp/servers/{server['id']}/tools", timeout=10)
-                    if response.status_code == 200:
-                        print_json(response.json(), f"Available Tools for {server['name']}")
-                    
-                    # Get server capabilities
-                    response = requests.get(f"{API_BASE}/mcp/servers/{server['id']}/capabilities", timeout=10)
-                    if response.status_code == 200:
-                        print_json(response.json(), f"Server Capabilities for {server['name']}")
-                    
-                else:
-                    print(f"Failed to connect to MCP server: {response.status_code}")
-                    if response.text:
-                        print(f"Error: {response.text}")
+                if capabilities_response.status_code == 200:
+                    print_json(orjson.loads(capabilities_response.content), f"Server Capabilities for {server['name']}")
+                
+            else:
+                print(f"Failed to connect to MCP server: {response.status_code}")
+                if response.text:
+                    print(f"Error: {response.text}")
         
         return True
         
@@ -171,9 +279,9 @@ def test_enhanced_task_creation():
             }
         }
         
-        response = requests.post(f"{API_BASE}/tasks/", json=task_data, timeout=10)
+        response = post_json("/tasks/", task_data)
         if response.status_code == 200:
-            task = response.json()
+            task = orjson.loads(response.content)
             print_json(task, "Created Enhanced Task")
             
             # Analyze the task using LLM
@@ -184,9 +292,9 @@ def test_enhanced_task_creation():
             }
             
             print(f"\n🧠 Analyzing task {task['id']} with LLM...")
-            response = requests.post(f"{API_BASE}/llm/analyze-task", json=analysis_data, timeout=30)
+            response = post_json("/llm/analyze-task", analysis_data, timeout=30)
             if response.status_code == 200:
-                print_json(response.json(), "LLM Task Analysis")
+                print_json(orjson.loads(response.content), "LLM Task Analysis")
             else:
                 print(f"Task analysis failed: {response.status_code}")
                 if response.text:
@@ -206,13 +314,17 @@ def test_task_execution_monitoring(task_id: int):
     try:
         print(f"\n⏱️ Monitoring Task Execution (ID: {task_id}):")
         
+        # Poll quickly at first, backing off towards 5s; ten attempts still
+        # cover roughly the same 30 seconds as a flat 3s interval
         max_attempts = 10
         attempt = 0
+        delay = 0.2
+        task_path = f"/tasks/{task_id}"
         
         while attempt < max_attempts:
-            response = requests.get(f"{API_BASE}/tasks/{task_id}", timeout=10)
+            response = client.get(task_path, timeout=10)
             if response.status_code == 200:
-                task = response.json()
+                task = orjson.loads(response.content)
                 status = task.get("status", "unknown")
                 
                 print(f"Attempt {attempt + 1}: Task status = {status}")
@@ -221,7 +333,14 @@ def test_task_execution_monitoring(task_id: int):
                     print_json(task, f"Final Task State (Status: {status})")
                     break
                 
-                time.sleep(3)  # Wait 3 seconds before next check
+                time.sleep(delay)
+                delay = min(delay * 1.8, 5.0)
+                attempt += 1
+            elif response.status_code in TRANSIENT_STATUS_CODES:
+                # Gateway hiccup; retry on the same backoff schedule
+                print(f"Attempt {attempt + 1}: Server returned {response.status_code}, retrying")
+                time.sleep(delay)
+                delay = min(delay * 1.8, 5.0)
                 attempt += 1
             else:
                 print(f"Failed to get task status: {response.status_code}")
@@ -238,14 +357,13 @@ def test_discovery_stats():
     try:
         print("\n📊 Testing Discovery Statistics:")
         
-        response = requests.get(f"{API_BASE}/discovery/stats", timeout=10)
-        if response.status_code == 200:
-            print_json(response.json(), "Discovery Statistics")
+        discovery_response, response = get_all(["/discovery/stats", "/servers/stats"])
+        if discovery_response.status_code == 200:
+            print_json(orjson.loads(discovery_response.content), "Discovery Statistics")
         
-        # Get server statistics
-        response = requests.get(f"{API_BASE}/servers/stats", timeout=10)
+        # Server statistics
         if response.status_code == 200:
-            print_json(response.json(), "Server Statistics")
+            print_json(orjson.loads(response.content), "Server Statistics")
         else:
             print(f"Server stats request failed: {response.status_code}")
         
@@ -267,17 +385,23 @@ def main():
     
     print("✅ System is healthy and operational!")
     
-    # Test monitoring system
-    print_header("2. Monitoring System")
-    test_monitoring()
-    
-    # Test LLM integration
-    print_header("3. LLM Integration")
-    test_llm_providers()
+    # Monitoring, LLM integration, MCP client and discovery checks don't
+    # depend on each other: run them together and show their output in order
+    independent_phases = [
+        ("2. Monitoring System", test_monitoring),
+        ("3. LLM Integration", test_llm_providers),
+        ("4. MCP Client Functionality", test_mcp_client),
+        ("6. Discovery and Statistics", test_discovery_stats)
+    ]
+    sys.stdout = PhaseOutput(sys.stdout)
+    try:
+        with ThreadPoolExecutor(max_workers=len(independent_phases)) as pool:
+            outputs = list(pool.map(lambda phase: run_phase(*phase), independent_phases))
+    finally:
+        sys.stdout = sys.stdout._target
     
-    # Test MCP client
-    print_header("4. MCP Client Functionality")
-    test_mcp_client()
+    for captured in outputs[:3]:
+        write_output(captured)
     
     # Test enhanced task creation
     print_header("5. Enhanced Task Management")
@@ -287,9 +411,7 @@ def main():
         # Monitor task execution
         test_task_execution_monitoring(task_id)
     
-    # Test discovery and statistics
-    print_header("6. Discovery and Statistics")
-    test_discovery_stats()
+    write_output(outputs[3])
     
     # Summary of new features
     print_header("7. New Features Summary")
@@ -359,4 +481,7 @@ def main():
     """)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    finally:
+        client.close()
\ No newline at end of file